@@ -4,11 +4,19 @@ Versão com TESAURO + FORMAS DE BUSCA + TEMPORIZADOR + CHECKPOINTS + RESUME + ND
 
 Requisitos:
   pip install requests beautifulsoup4
+Opcional:
+  pip install lxml   (parser HTML mais rápido)
+  pip install ijson  (leitura incremental das respostas JSON das APIs)
+  pip install zstandard  (NDJSON comprimido em zstd)
+  pip install pyarrow    (exportação Parquet/Arrow do conjunto final)
+  pip install httpx      (modo --async: muitas requisições em voo numa única thread;
+                          sem ele, --async usa requests em threads auxiliares)
 """
 
 import os
 import re
 import json
+import asyncio
 import time
 import argparse
 import datetime as dt
@@ -16,17 +24,96 @@ import random
 import unicodedata
 import signal
 import html  
-from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import email.utils
+import gzip
+import importlib.util
+import multiprocessing
+import queue
+import threading
+import sqlite3
+import hashlib
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain, count, islice
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
 from urllib.parse import urljoin, urlparse, quote
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+
+try:  # parser C, bem mais rápido que o html.parser puro-Python
+    import lxml  # noqa: F401
+    _HAS_LXML = True
+except ImportError:
+    _HAS_LXML = False
+
+try:  # NDJSON comprimido em zstd (gzip vem da biblioteca padrão)
+    import zstandard
+    _HAS_ZSTD = True
+except ImportError:
+    zstandard = None
+    _HAS_ZSTD = False
+
+# pyarrow é pesado de importar: só é carregado na exportação
+_HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+try:  # decodificação JSON incremental (itens um a um, sem carregar a página inteira)
+    import ijson
+    _HAS_IJSON = True
+except ImportError:
+    ijson = None
+    _HAS_IJSON = False
+
+try:  # cliente HTTP assíncrono do modo --async (sem ele, http_get roda em threads auxiliares)
+    import httpx
+    _HAS_HTTPX = True
+except ImportError:
+    httpx = None
+    _HAS_HTTPX = False
 
 # ============ Configuração global ============
 USER_AGENT = os.getenv("QS_USER_AGENT", "quadro_sintese/1.6 (+https://example.org)")
 TIMEOUT = 30
 REQUEST_DELAY = 1.2  # atraso padrão entre requisições
 
+# Parser HTML: lxml quando instalado (QS_HTML_PARSER força outro backend do BeautifulSoup)
+HTML_PARSER = os.getenv("QS_HTML_PARSER") or ("lxml" if _HAS_LXML else "html.parser")
+
+# Pool de conexões HTTP (uma sessão keep-alive por host)
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 8
+
+# Modo --async: unidades descritor × variante × fonte em andamento e conexões abertas no total
+ASYNC_CONCURRENCY = 64
+ASYNC_MAX_CONNECTIONS = 100
+
+# Limites por host: (requisições/s, rajada). Hosts ausentes usam 1/--delay.
+RATE_LIMITS_DEFAULT = {
+    "api.openalex.org": (10.0, 10),   # polite pool
+    "api.crossref.org": (5.0, 5),
+    "bdtd.ibict.br": (2.0, 4),        # API + Export + página do registro
+}
+RATE_BURST_DEFAULT = 2
+
+# Cache HTTP em disco (desligado por padrão; ver --cache-db)
+CACHE_TTL_DEFAULT = 3 * 24 * 3600
+CACHE_TTL_BY_HOST = {
+    "api.openalex.org": 3 * 24 * 3600,
+    "api.crossref.org": 3 * 24 * 3600,
+    "search.scielo.org": 24 * 3600,
+    "scielo.br": 14 * 24 * 3600,   # páginas de artigo mudam pouco
+    "bdtd.ibict.br": 7 * 24 * 3600,
+}
+SOURCE_HOSTS = {"openalex": "api.openalex.org", "crossref": "api.crossref.org",
+                "scielo": "search.scielo.org", "bdtd": "bdtd.ibict.br"}
+CACHE_KEY_HEADERS = ("accept", "accept-language")
+
 OUTPUT_JSON = "resultado_busca_multi10.json"
 OUTPUT_NDJSON = "resultado_busca_multi10.jsonl"
 
@@ -37,15 +124,36 @@ SCIELO_ENRICH_TIMEOUT = 5.0
 
 OPENALEX_PER_PAGE = 25
 OPENALEX_MAX_PAGES = 3
+OPENALEX_MAX_PER_PAGE = 200  # teto da API (modo --fast-fetch)
+OPENALEX_BATCH_SIZE = 50  # DOIs por requisição no filtro doi:a|b|… (limite da API)
+DOI_BACKFILL_SECONDS = 120  # janela própria do --doi-backfill depois da busca (fora do --max-seconds)
+OPENALEX_SELECT = ("id,doi,display_name,publication_year,type,authorships,"
+                   "abstract_inverted_index,primary_location,open_access")
 
 CROSSREF_ROWS = 40
 CROSSREF_MAX_PAGES = 3
+CROSSREF_MAX_ROWS = 1000  # teto da API (modo --fast-fetch, paginação por cursor)
+CROSSREF_SELECT = "title,author,issued,abstract,DOI,type,URL,score"
 
 BDTD_LIMIT_PER_PAGE = 20
 BDTD_MAX_PAGES = 2
 BDTD_ENRICH_MAX = 10
 BDTD_ENRICH_TIMEOUT = 6.0
 
+# Paginação adaptativa (--adaptive-pages): os *_MAX_PAGES viram orçamento nominal por consulta
+ADAPTIVE_NOVELTY_MIN = 0.1      # fração mínima de dedupe_keys inéditas na página
+ADAPTIVE_PATIENCE = 1           # páginas seguidas abaixo do mínimo antes de parar
+ADAPTIVE_RELEVANCE_FLOOR = 0.15 # score da página / score da 1ª página (OpenAlex, Crossref)
+ADAPTIVE_MAX_FACTOR = 3         # teto de páginas de uma consulta com orçamento emprestado
+
+# Enriquecimento em pool (0 = em linha, como antes)
+ENRICH_WORKERS = 0
+ENRICH_PER_HOST = 2
+
+# Parsing em processos (0 = na própria thread que buscou); corpos aguardando parsing
+PARSE_WORKERS = 0
+PARSE_QUEUE_SIZE = 32
+
 # Endpoints BDTD
 BDTD_HOST = "https://bdtd.ibict.br"
 BDTD_API_BASE = f"{BDTD_HOST}/vufind/api/v1/search"
@@ -146,15 +254,80 @@ def _signal_handler(signum, frame):
 signal.signal(signal.SIGINT, _signal_handler)
 signal.signal(signal.SIGTERM, _signal_handler)
 
+def make_soup(markup: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """BeautifulSoup com o backend configurado; parse_only limita a árvore aos trechos necessários."""
+    return BeautifulSoup(markup, HTML_PARSER, parse_only=parse_only)
+
+class PageText:
+    """Texto completo de uma página, extraído uma única vez e reutilizado (DOI, tipo…)."""
+    def __init__(self, soup: BeautifulSoup):
+        self.soup = soup
+        self._text: Optional[str] = None
+        self._lower: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.soup.get_text(" ", strip=True)
+        return self._text
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+def sleep_with_jitter(base: float):
+    time.sleep(base + random.uniform(0, base * 0.3))
+
+# ============ Normalização de texto ============
+# chamadas por registro (e várias vezes no dedupe/merge): padrões pré-compilados e
+# memoização, porque autores, descritores e títulos se repetem muito entre registros
+NORMALIZE_CACHE_SIZE = 1 << 16
+CLEAN_TEXT_CACHE_MAX_LEN = 256  # textos longos (resumos) raramente se repetem
+_TITLE_CHARS_RE = re.compile(r"[^\w\sáéíóúàâêôãõç-]", re.I)
+_TAG_RE = re.compile(r"<[^>]+>")
+_YEAR_RE = re.compile(r"\b(18|19|20)\d{2}\b")
+
+def _accent_table() -> Dict[int, str]:
+    # Latin-1 + Latin Extended-A/B: cobre os acentos de pt/es/fr sem varrer o Unicode inteiro
+    table = {}
+    for cp in range(0x80, 0x250):
+        c = chr(cp)
+        base = "".join(x for x in unicodedata.normalize("NFKD", c) if not unicodedata.combining(x))
+        if base != c and base.isascii():
+            table[cp] = base
+    return table
+
+_ACCENT_TABLE = _accent_table()
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
 def normalize_title(t: str) -> str:
-    t = re.sub(r"\s+", " ", (t or "")).strip().lower()
-    t = re.sub(r"[^\w\sáéíóúàâêôãõç-]", "", t, flags=re.I)
-    return t
+    # " ".join(split()) colapsa os mesmos espaços que \s+ e já descarta as pontas
+    t = " ".join((t or "").split()).lower()
+    return _TITLE_CHARS_RE.sub("", t)
 
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
 def strip_accents(s: str) -> str:
-    if not s: return s
+    if not s or s.isascii(): return s
+    out = s.translate(_ACCENT_TABLE)
+    if out.isascii():
+        return out
+    # fora da tabela (marcas combinantes soltas, compatibilidade, outros alfabetos)
     return "".join(c for c in unicodedata.normalize("NFKD", s) if not unicodedata.combining(c))
 
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _clean_text_cached(a: str) -> str:
+    return _clean_text(a)
+
+def _clean_text(a: str) -> str:
+    if "&" in a:
+        a = html.unescape(a)
+    if "<" in a:
+        a = _TAG_RE.sub(" ", a)
+    # split() usa a mesma noção de espaço que \s, sem uma substituição por palavra
+    return " ".join(a.split())
+
 def clean_text(a: Optional[str]) -> str:
     """
     Limpa texto:
@@ -164,30 +337,356 @@ def clean_text(a: Optional[str]) -> str:
     """
     if not a:
         return ""
-    a = html.unescape(a)                    
-    a = re.sub(r"<[^>]+>", " ", a)
-    a = re.sub(r"\s+", " ", a).strip()
-    return a
+    if len(a) <= CLEAN_TEXT_CACHE_MAX_LEN:
+        return _clean_text_cached(a)
+    return _clean_text(a)
 
-def sleep_with_jitter(base: float):
-    time.sleep(base + random.uniform(0, base * 0.3))
+# ============ Sessões HTTP (keep-alive por host) ============
+_SESSIONS: Dict[str, requests.Session] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+def configure_http_pool(pool_connections: int, pool_maxsize: int):
+    """Ajusta o tamanho dos pools; sessões já abertas são descartadas."""
+    global HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE
+    HTTP_POOL_CONNECTIONS = max(1, int(pool_connections))
+    HTTP_POOL_MAXSIZE = max(1, int(pool_maxsize))
+    close_sessions()
+
+def get_session(url: str) -> requests.Session:
+    """
+    Sessão compartilhada por host: reaproveita conexões TCP/TLS (keep-alive) entre
+    páginas de busca e enriquecimentos, com gzip habilitado. As tentativas ficam a
+    cargo de http_get, por isso o adapter não faz retry próprio.
+    """
+    host = (urlparse(url).netloc or "").lower()
+    with _SESSIONS_LOCK:
+        sess = _SESSIONS.get(host)
+        if sess is None:
+            sess = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS,
+                                  pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=0)
+            sess.mount("https://", adapter)
+            sess.mount("http://", adapter)
+            sess.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+            _SESSIONS[host] = sess
+        return sess
+
+def close_sessions():
+    with _SESSIONS_LOCK:
+        for sess in _SESSIONS.values():
+            try:
+                sess.close()
+            except Exception:
+                pass
+        _SESSIONS.clear()
+
+# ============ Limitador de taxa por host (token bucket) ============
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.max_rate = rate
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.ts = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self, now: float) -> float:
+        """Consome uma ficha se houver; senão devolve quantos segundos esperar."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.rate == float("inf"):
+            return 0.0
+        self.tokens = min(self.burst, self.tokens + (now - self.ts) * self.rate)
+        self.ts = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else 1.0
+
+def _parse_retry_after(val: Optional[str]) -> Optional[float]:
+    if not val: return None
+    val = val.strip()
+    try:
+        return max(0.0, float(val))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(val)
+        return max(0.0, when.timestamp() - time.time())
+    except Exception:
+        return None
+
+def _header(r: requests.Response, *names: str) -> Optional[str]:
+    for n in names:
+        v = r.headers.get(n)
+        if v is not None: return v
+    return None
+
+class HostRateLimiter:
+    """
+    Um token bucket por host. acquire() bloqueia a thread chamadora até haver ficha;
+    observe() ajusta o bucket a partir de Retry-After e dos cabeçalhos X-RateLimit-*
+    (ou X-Rate-Limit-*, como no Crossref).
+    """
+    def __init__(self, default_rate: float, limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 default_burst: int = RATE_BURST_DEFAULT):
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.limits = dict(RATE_LIMITS_DEFAULT if limits is None else limits)
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def _bucket(self, host: str) -> TokenBucket:
+        b = self.buckets.get(host)
+        if b is None:
+            rate, burst = self.default_rate, self.default_burst
+            for h, (r_, b_) in self.limits.items():
+                if host == h or host.endswith("." + h):
+                    rate, burst = r_, b_
+                    break
+            b = self.buckets[host] = TokenBucket(rate, burst)
+        return b
+
+    def acquire(self, url: str):
+        host = (urlparse(url).netloc or "").lower()
+        while not STOP_REQUESTED:
+            with self.lock:
+                wait = self._bucket(host).reserve(time.monotonic())
+            if wait <= 0:
+                return
+            time.sleep(min(wait, 1.0))
+
+    async def acquire_async(self, url: str):
+        """Como acquire(), mas cede o event loop enquanto espera a ficha."""
+        host = (urlparse(url).netloc or "").lower()
+        while not STOP_REQUESTED:
+            with self.lock:
+                wait = self._bucket(host).reserve(time.monotonic())
+            if wait <= 0:
+                return
+            await asyncio.sleep(min(wait, 1.0))
+
+    def block(self, url: str, seconds: float):
+        host = (urlparse(url).netloc or "").lower()
+        with self.lock:
+            b = self._bucket(host)
+            b.blocked_until = max(b.blocked_until, time.monotonic() + seconds)
+            b.tokens = 0.0
+
+    def observe(self, url: str, r: requests.Response) -> Optional[float]:
+        """Aplica os cabeçalhos de limite da resposta; devolve o Retry-After (s), se houver."""
+        host = (urlparse(url).netloc or "").lower()
+        retry_after = _parse_retry_after(r.headers.get("Retry-After")) if r.status_code in (429, 503) else None
+        limit = _header(r, "X-RateLimit-Limit", "X-Rate-Limit-Limit")
+        interval = _header(r, "X-RateLimit-Interval", "X-Rate-Limit-Interval")
+        remaining = _header(r, "X-RateLimit-Remaining", "X-Rate-Limit-Remaining")
+        reset = _header(r, "X-RateLimit-Reset", "X-Rate-Limit-Reset")
+        with self.lock:
+            b = self._bucket(host)
+            now = time.monotonic()
+            if limit and interval:
+                try:
+                    secs = float(interval.rstrip("s") or 1)
+                    published = float(limit) / secs if secs > 0 else b.rate
+                    # nunca acima do configurado; abaixo quando o servidor anuncia menos
+                    b.rate = min(b.max_rate, published)
+                except ValueError:
+                    pass
+            if remaining is not None and reset:
+                try:
+                    if int(float(remaining)) <= 0:
+                        rs = float(reset)
+                        wait = rs - time.time() if rs > 1e9 else rs  # epoch ou segundos
+                        if wait > 0:
+                            b.blocked_until = max(b.blocked_until, now + wait)
+                            b.tokens = 0.0
+                except ValueError:
+                    pass
+            if retry_after is not None:
+                b.blocked_until = max(b.blocked_until, now + retry_after)
+                b.tokens = 0.0
+        return retry_after
+
+RATE_LIMITER = HostRateLimiter(1.0 / REQUEST_DELAY)
+
+def configure_rate_limits(delay: float, overrides: Optional[Dict[str, Tuple[float, int]]] = None) -> HostRateLimiter:
+    """delay define o ritmo dos hosts sem limite próprio; overrides aceita host ou nome de fonte."""
+    global RATE_LIMITER
+    limits = dict(RATE_LIMITS_DEFAULT)
+    for k, v in (overrides or {}).items():
+        limits[SOURCE_HOSTS.get(k, k)] = v
+    RATE_LIMITER = HostRateLimiter(1.0 / delay if delay and delay > 0 else float("inf"), limits)
+    return RATE_LIMITER
+
+def parse_rate_limits(items: Optional[List[str]]) -> Dict[str, Tuple[float, int]]:
+    out: Dict[str, Tuple[float, int]] = {}
+    for it in items or []:
+        k, v = it.split("=", 1)
+        rate, _, burst = v.partition(":")
+        out[k.strip().lower()] = (float(rate), int(burst) if burst else max(1, int(float(rate))))
+    return out
+
+# ============ Cache HTTP em disco ============
+class HttpCache:
+    """
+    Cache de respostas 200 em SQLite, endereçado por hash(URL + params + cabeçalhos
+    relevantes). Entradas vencidas são revalidadas com ETag/Last-Modified; no modo
+    offline (cache-only) nenhuma requisição sai para a rede.
+    """
+    def __init__(self, path: str, ttl_by_host: Optional[Dict[str, float]] = None,
+                 default_ttl: float = CACHE_TTL_DEFAULT, offline: bool = False):
+        self.path = path
+        self.ttl_by_host = dict(CACHE_TTL_BY_HOST if ttl_by_host is None else ttl_by_host)
+        self.default_ttl = default_ttl
+        self.offline = offline
+        self.hits = self.misses = self.revalidated = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY, url TEXT, headers TEXT, body BLOB, encoding TEXT,
+            etag TEXT, last_modified TEXT, fetched_at REAL)""")
+
+    @staticmethod
+    def make_key(url: str, params: Optional[dict], headers: Optional[dict]) -> str:
+        hdrs = sorted((k.lower(), str(v)) for k, v in (headers or {}).items()
+                      if k.lower() in CACHE_KEY_HEADERS)
+        prm = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        raw = json.dumps([url, prm, hdrs], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, url: str) -> float:
+        host = (urlparse(url).netloc or "").lower()
+        for h, ttl in self.ttl_by_host.items():
+            if host == h or host.endswith("." + h):
+                return ttl
+        return self.default_ttl
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT url, headers, body, encoding, etag, last_modified, fetched_at FROM responses WHERE key=?",
+                (key,)).fetchone()
+        if not row: return None
+        return {"url": row[0], "headers": json.loads(row[1] or "{}"), "body": row[2], "encoding": row[3],
+                "etag": row[4], "last_modified": row[5], "fetched_at": row[6]}
+
+    def is_fresh(self, entry: Dict[str, Any], url: str) -> bool:
+        return time.time() - (entry.get("fetched_at") or 0) < self.ttl_for(url)
+
+    def store(self, key: str, r: requests.Response):
+        # o corpo já vem descomprimido; cabeçalhos de transporte não fazem sentido no cache
+        hdrs = {k: v for k, v in r.headers.items()
+                if k.lower() not in ("content-encoding", "content-length", "transfer-encoding", "connection")}
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, url, headers, body, encoding, etag, last_modified, fetched_at) "
+                "VALUES (?,?,?,?,?,?,?,?)",
+                (key, r.url, json.dumps(hdrs), r.content, r.encoding,
+                 r.headers.get("ETag"), r.headers.get("Last-Modified"), time.time()))
+
+    def touch(self, key: str):
+        with self.lock:
+            self.conn.execute("UPDATE responses SET fetched_at=? WHERE key=?", (time.time(), key))
+
+    @staticmethod
+    def to_response(entry: Dict[str, Any]) -> requests.Response:
+        r = requests.Response()
+        r.status_code = 200
+        r._content = entry["body"] or b""
+        r.headers = CaseInsensitiveDict(entry["headers"])
+        r.url = entry["url"]
+        r.encoding = entry["encoding"]
+        r.from_cache = True
+        return r
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+HTTP_CACHE: Optional[HttpCache] = None
+
+def configure_http_cache(path: Optional[str], ttl_overrides: Optional[Dict[str, float]] = None,
+                         offline: bool = False) -> Optional[HttpCache]:
+    """
+    Ativa o cache. ttl_overrides aceita host, nome de fonte (openalex, crossref,
+    scielo, bdtd) ou "default" como chave.
+    """
+    global HTTP_CACHE
+    if HTTP_CACHE is not None:
+        HTTP_CACHE.close()
+        HTTP_CACHE = None
+    if not path:
+        return None
+    ttl_by_host = dict(CACHE_TTL_BY_HOST)
+    default_ttl = CACHE_TTL_DEFAULT
+    for k, v in (ttl_overrides or {}).items():
+        if k == "default":
+            default_ttl = v
+        else:
+            ttl_by_host[SOURCE_HOSTS.get(k, k)] = v
+    HTTP_CACHE = HttpCache(path, ttl_by_host, default_ttl, offline)
+    return HTTP_CACHE
+
+def parse_cache_ttls(items: Optional[List[str]]) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for it in items or []:
+        if "=" in it:
+            k, v = it.split("=", 1)
+            out[k.strip().lower()] = float(v)
+        else:
+            out["default"] = float(it)
+    return out
 
 def http_get(url: str, headers: dict, timeout: int, retries: int = 2,
              backoff: float = 1.6, debug: bool = False,
-             params: Optional[dict] = None) -> Optional[requests.Response]:
+             params: Optional[dict] = None, stream: bool = False) -> Optional[requests.Response]:
+    cache = HTTP_CACHE
+    # com cache o corpo precisa ser lido inteiro para ser gravado: streaming só sem cache
+    stream = stream and cache is None
+    ckey, entry = None, None
+    if cache is not None:
+        ckey = cache.make_key(url, params, headers)
+        entry = cache.lookup(ckey)
+        if entry and (cache.offline or cache.is_fresh(entry, url)):
+            cache.hits += 1
+            if debug:
+                print(f"  [CACHE] hit {url} params={params or {}}")
+            return cache.to_response(entry)
+        if cache.offline:
+            cache.misses += 1
+            if debug:
+                print(f"  [CACHE] miss (offline) {url} params={params or {}}")
+            return None
+        if entry:
+            headers = dict(headers)
+            if entry.get("etag"): headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"): headers["If-Modified-Since"] = entry["last_modified"]
     last_err = None
     for attempt in range(1, retries + 1):
         if STOP_REQUESTED: return None
         try:
             if debug:
                 print(f"  [GET] {url} (try {attempt}/{retries}) params={params or {}}")
-            r = requests.get(url, headers=headers, timeout=timeout, params=params)
+            RATE_LIMITER.acquire(url)
+            r = get_session(url).get(url, headers=headers, timeout=timeout, params=params, stream=stream)
+            retry_after = RATE_LIMITER.observe(url, r)
+            if r.status_code == 304 and entry is not None:
+                cache.touch(ckey)
+                cache.revalidated += 1
+                return cache.to_response(entry)
             if r.status_code == 200:
+                if cache is not None:
+                    cache.misses += 1
+                    cache.store(ckey, r)
                 return r
             if debug:
                 print(f"  [GET] status={r.status_code} body={r.text[:200]!r}")
+            r.close()
             if r.status_code in (403, 429, 500, 502, 503, 504):
-                sleep_with_jitter(backoff ** attempt)
+                if retry_after is None:
+                    sleep_with_jitter(backoff ** attempt)
                 continue
             return None
         except requests.RequestException as e:
@@ -199,6 +698,264 @@ def http_get(url: str, headers: dict, timeout: int, retries: int = 2,
         print(f"  [GET] falhou após {retries} tentativas: {last_err}")
     return None
 
+# ============ HTTP assíncrono (modo --async) ============
+_ASYNC_CLIENT = None
+
+def _async_client():
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is None:
+        # requests segue redirecionamentos por padrão; o httpx não
+        _ASYNC_CLIENT = httpx.AsyncClient(
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS,
+                                max_keepalive_connections=HTTP_POOL_CONNECTIONS * HTTP_POOL_MAXSIZE))
+    return _ASYNC_CLIENT
+
+async def close_async_client():
+    global _ASYNC_CLIENT
+    if _ASYNC_CLIENT is not None:
+        await _ASYNC_CLIENT.aclose()
+        _ASYNC_CLIENT = None
+
+def _as_requests_response(r) -> requests.Response:
+    """Resposta do httpx (já lida) com a interface de requests.Response que os parsers usam."""
+    out = requests.Response()
+    out.status_code = r.status_code
+    out._content = r.content
+    out.headers = CaseInsensitiveDict(r.headers.items())
+    out.url = str(r.url)
+    # mesma decisão de charset do requests (text/* sem charset → ISO-8859-1)
+    out.encoding = requests.utils.get_encoding_from_headers(out.headers)
+    return out
+
+async def http_get_async(url: str, headers: dict, timeout: int, retries: int = 2,
+                         backoff: float = 1.6, debug: bool = False,
+                         params: Optional[dict] = None) -> Optional[requests.Response]:
+    """
+    http_get para o event loop: mesmo limitador por host e mesmas regras de retentativa,
+    com as esperas em asyncio.sleep. Sem httpx, ou com o cache HTTP ligado (SQLite
+    síncrono), delega ao próprio http_get numa thread auxiliar.
+    """
+    if not _HAS_HTTPX or HTTP_CACHE is not None:
+        return await asyncio.to_thread(http_get, url, headers, timeout, retries, backoff, debug, params)
+    client = _async_client()
+    last_err = None
+    for attempt in range(1, retries + 1):
+        if STOP_REQUESTED: return None
+        try:
+            if debug:
+                print(f"  [GET] {url} (try {attempt}/{retries}) params={params or {}}")
+            await RATE_LIMITER.acquire_async(url)
+            r = _as_requests_response(await client.get(url, headers=headers, params=params, timeout=timeout))
+            retry_after = RATE_LIMITER.observe(url, r)
+            if r.status_code == 200:
+                return r
+            if debug:
+                print(f"  [GET] status={r.status_code} body={r.text[:200]!r}")
+            if r.status_code in (403, 429, 500, 502, 503, 504):
+                if retry_after is None:
+                    await asyncio.sleep(backoff ** attempt + random.uniform(0, backoff ** attempt * 0.3))
+                continue
+            return None
+        except httpx.HTTPError as e:
+            last_err = e
+            if debug:
+                print(f"  [GET] erro: {e}")
+            await asyncio.sleep(backoff ** attempt + random.uniform(0, backoff ** attempt * 0.3))
+    if debug and last_err:
+        print(f"  [GET] falhou após {retries} tentativas: {last_err}")
+    return None
+
+# ============ JSON em streaming ============
+class JsonItems:
+    """
+    Itera os itens da primeira lista encontrada entre `item_paths` (ex.: "results",
+    "message.items") de uma resposta JSON. Com ijson e corpo ainda não lido (stream=True),
+    decodifica incrementalmente; senão recai em r.json(). Os escalares em `meta_paths`
+    ficam em .meta ao fim da iteração, qualquer que seja a posição deles no corpo.
+    """
+    def __init__(self, r: requests.Response, item_paths: Tuple[str, ...], meta_paths: Tuple[str, ...] = ()):
+        self.r = r
+        self.item_paths = item_paths
+        self.meta_paths = meta_paths
+        self.meta: Dict[str, Any] = {}
+        self.error = False
+
+    def __iter__(self):
+        try:
+            # _content é False enquanto o corpo não foi lido (convenção do requests)
+            if _HAS_IJSON and getattr(self.r, "_content", None) is False:
+                yield from self._stream()
+            else:
+                yield from self._whole()
+        except Exception:
+            self.error = True
+        finally:
+            self.r.close()
+
+    def _whole(self):
+        data = self.r.json()
+        for path in self.meta_paths:
+            cur = data
+            for key in path.split("."):
+                cur = cur.get(key) if isinstance(cur, dict) else None
+            if cur is not None:
+                self.meta[path] = cur
+        for path in self.item_paths:
+            cur = data
+            for key in path.split("."):
+                cur = cur.get(key) if isinstance(cur, dict) else None
+            if isinstance(cur, list):
+                yield from cur
+                return
+
+    def _stream(self):
+        self.r.raw.decode_content = True
+        item_prefixes = {p + ".item" for p in self.item_paths}
+        meta_paths = set(self.meta_paths)
+        active, builder, end_event = None, None, None
+        for prefix, event, value in ijson.parse(self.r.raw, use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == active and event == end_event:
+                    yield builder.value
+                    builder = None
+                continue
+            if prefix in meta_paths and event in ("string", "number", "boolean", "null"):
+                self.meta[prefix] = value
+            elif prefix in item_prefixes and (active is None or prefix == active):
+                active = prefix  # fixa a primeira lista encontrada
+                if event in ("start_map", "start_array"):
+                    builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+                    end_event = "end_" + event[6:]
+                elif event not in ("end_map", "end_array"):
+                    yield value
+
+# ============ Pool de parsing (processos) ============
+def _parse_worker_init(html_parser: str):
+    global HTML_PARSER
+    HTML_PARSER = html_parser
+    # Ctrl+C chega a todo o grupo de processos; quem finaliza com checkpoint é o principal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+class ParsePool:
+    """
+    Processos para o trabalho de CPU (BeautifulSoup, json → Record, clean_text, resumo
+    da OpenAlex), fora do GIL das threads que fazem a rede. Recebe corpos brutos e
+    devolve registros prontos. No máximo `queue_size` corpos ficam em espera/parsing:
+    além disso, submit() bloqueia quem busca (contrapressão) em vez de acumular
+    páginas em memória.
+    """
+    def __init__(self, workers: int, queue_size: int = PARSE_QUEUE_SIZE):
+        # spawn: as lanes e o pool de enriquecimento são threads, e fork com threads vivas não é seguro
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=_parse_worker_init, initargs=(HTML_PARSER,))
+        self.slots = threading.BoundedSemaphore(max(1, queue_size))
+
+    def submit(self, fn, *args) -> Future:
+        self.slots.acquire()
+        try:
+            fut = self.executor.submit(fn, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        fut.add_done_callback(lambda _: self.slots.release())
+        return fut
+
+    def run(self, fn, *args) -> Any:
+        return self.submit(fn, *args).result()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+PARSE_POOL: Optional[ParsePool] = None
+
+def configure_parse_pool(workers: int, queue_size: int = PARSE_QUEUE_SIZE) -> Optional[ParsePool]:
+    global PARSE_POOL
+    close_parse_pool()
+    PARSE_POOL = ParsePool(workers, queue_size) if workers and workers > 0 else None
+    return PARSE_POOL
+
+def close_parse_pool():
+    global PARSE_POOL
+    if PARSE_POOL is not None:
+        PARSE_POOL.shutdown()
+        PARSE_POOL = None
+
+def parse_call(fn, *args) -> Any:
+    """fn(*args) no pool de parsing, se houver; senão na própria thread. fn e args precisam ser picklable."""
+    return fn(*args) if PARSE_POOL is None else PARSE_POOL.run(fn, *args)
+
+async def parse_call_async(fn, *args) -> Any:
+    if PARSE_POOL is None:
+        return fn(*args)
+    # a espera por vaga (contrapressão) fica numa thread auxiliar, não no event loop
+    return await asyncio.to_thread(PARSE_POOL.run, fn, *args)
+
+class ParsedPage:
+    """Página JSON decodificada e convertida num processo do pool (itens, .meta e .error como em JsonItems)."""
+    __slots__ = ("items", "meta", "error")
+
+    def __init__(self, items: List[Any], meta: Dict[str, Any], error: bool):
+        self.items = items
+        self.meta = meta
+        self.error = error
+
+    def __iter__(self):
+        return iter(self.items)
+
+class BuiltItems:
+    """JsonItems com cada item convertido por build(item, *args), ainda em streaming."""
+    def __init__(self, src: JsonItems, build, args: tuple):
+        self.src = src
+        self.build = build
+        self.args = args
+
+    def __iter__(self):
+        for it in self.src:
+            yield self.build(it, *self.args)
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        return self.src.meta
+
+    @property
+    def error(self) -> bool:
+        return self.src.error
+
+def parse_json_page(body: bytes, item_paths: Tuple[str, ...], meta_paths: Tuple[str, ...],
+                    build, args: tuple) -> ParsedPage:
+    r = requests.Response()
+    r.status_code = 200
+    r._content = body
+    src = JsonItems(r, item_paths, meta_paths)
+    items = [build(it, *args) for it in src]
+    return ParsedPage(items, src.meta, src.error)
+
+def page_items(r: requests.Response, item_paths: Tuple[str, ...], meta_paths: Tuple[str, ...],
+               build, *args) -> Union[BuiltItems, ParsedPage]:
+    """
+    Itens da página já convertidos por build(item, *args). Sem pool de parsing, segue
+    em streaming (JsonItems); com pool, o corpo inteiro vai para um processo.
+    """
+    if PARSE_POOL is None:
+        return BuiltItems(JsonItems(r, item_paths, meta_paths), build, args)
+    try:
+        body = r.content
+    except Exception:
+        return ParsedPage([], {}, True)
+    finally:
+        r.close()
+    return PARSE_POOL.run(parse_json_page, body, item_paths, meta_paths, build, args)
+
+async def page_items_async(r: requests.Response, item_paths: Tuple[str, ...], meta_paths: Tuple[str, ...],
+                           build, *args) -> Union[BuiltItems, ParsedPage]:
+    if PARSE_POOL is None:
+        return BuiltItems(JsonItems(r, item_paths, meta_paths), build, args)
+    return await parse_call_async(parse_json_page, r.content, item_paths, meta_paths, build, args)
+
 def pick_doi_from(*vals: Any) -> str:
     def scan(v):
         if v is None:
@@ -233,8 +990,7 @@ def pick_year_from(*vals: Any) -> Optional[int]:
             for it in v.values():
                 y = pick_year_from(it)
                 if y: return y
-        s = str(v)
-        m = re.search(r'\b(18|19|20)\d{2}\b', s)
+        m = _YEAR_RE.search(v if isinstance(v, str) else str(v))
         if m: return int(m.group())
     return None
 
@@ -383,26 +1139,177 @@ def build_descritores(custom_file: Optional[str] = None) -> List[str]:
     return out
 
 # ============ Registro unificado & dedupe/merge ============
+RECORD_FIELDS = ("descritor", "consulta", "fonte", "fontes", "tipo", "ano", "titulo",
+                 "autores", "resumo", "doi", "link", "hit_context")
+_INTERNED_FIELDS = frozenset({"fonte", "tipo"})
+_HIT_KEYS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+def pack_hit(h: Union[Dict[str, Any], tuple]) -> tuple:
+    """
+    hit_context compacto: (chaves, v1, v2, …). A tupla de chaves é única por formato
+    (cada fonte usa sempre as mesmas) e os valores texto são internados.
+    """
+    if isinstance(h, tuple):
+        return h
+    keys = tuple(h)
+    keys = _HIT_KEYS.setdefault(keys, keys)
+    return (keys,) + tuple(sys.intern(v) if isinstance(v, str) else v for v in h.values())
+
+def unpack_hit(h: Union[Dict[str, Any], tuple]) -> Dict[str, Any]:
+    return dict(zip(h[0], h[1:])) if isinstance(h, tuple) else h
+
+class Record:
+    """
+    Registro unificado com __slots__ (bem menor que um dict por ocorrência). Mantém a
+    interface de dict usada no código (r["campo"], r.get, r.copy) e serializa, via
+    to_dict(), exatamente no esquema JSON de sempre.
+    """
+    __slots__ = RECORD_FIELDS
+
+    def __init__(self, descritor: Any = "", consulta: Any = "", fonte: str = "",
+                 fontes: Optional[List[str]] = None, tipo: str = "", ano: Any = "",
+                 titulo: str = "", autores: str = "", resumo: str = "", doi: str = "",
+                 link: str = "", hit_context: Optional[List[Any]] = None):
+        self.descritor = descritor
+        self.consulta = consulta
+        self.fonte = sys.intern(fonte) if fonte else ""
+        self.fontes = [sys.intern(f) for f in fontes] if fontes else []
+        self.tipo = sys.intern(tipo) if tipo else ""
+        self.ano = ano
+        self.titulo = titulo
+        self.autores = autores
+        self.resumo = resumo
+        self.doi = doi
+        self.link = link
+        self.hit_context = [pack_hit(h) for h in hit_context] if hit_context else []
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Record":
+        return cls(**{k: d[k] for k in RECORD_FIELDS if k in d and d[k] is not None})
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in RECORD_FIELDS:
+            raise KeyError(key)
+        if key in _INTERNED_FIELDS and isinstance(value, str):
+            value = sys.intern(value)
+        elif key == "fontes":
+            value = [sys.intern(f) for f in value]
+        elif key == "hit_context":
+            value = [pack_hit(h) for h in value]
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in RECORD_FIELDS
+
+    def __iter__(self):
+        return iter(RECORD_FIELDS)
+
+    def keys(self) -> Tuple[str, ...]:
+        return RECORD_FIELDS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in RECORD_FIELDS else default
+
+    def copy(self) -> "Record":
+        out = Record.__new__(Record)
+        for k in RECORD_FIELDS:
+            setattr(out, k, getattr(self, k))
+        return out
+
+    def hits(self) -> List[Dict[str, Any]]:
+        return [unpack_hit(h) for h in self.hit_context]
+
+    def __getstate__(self) -> tuple:
+        return tuple(getattr(self, k) for k in RECORD_FIELDS)
+
+    def __setstate__(self, state: tuple):
+        # vindo de outro processo (pool de parsing): reinterna textos e as chaves do hit_context
+        for k, v in zip(RECORD_FIELDS, state):
+            if k == "hit_context":
+                v = [(_HIT_KEYS.setdefault(h[0], h[0]),) + h[1:] if isinstance(h, tuple) else h for h in v]
+            self[k] = v
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = {k: getattr(self, k) for k in RECORD_FIELDS}
+        d["hit_context"] = self.hits()
+        return d
+
+    def __repr__(self) -> str:
+        return f"Record({self.fonte!r}, {self.titulo[:40]!r}, doi={self.doi!r})"
+
+# ===== hit_context: completo ou contadores por (fonte, consulta) =====
+HIT_CONTEXT_MODE = "full"   # "full": uma entrada por ocorrência; "counter": contadores
+HIT_CONTEXT_CAP = 0         # máximo de entradas por registro (0 = sem limite)
+HIT_OVERFLOW = ("*", "*")   # (fonte, consulta) que acumula o excedente do limite no modo counter
+_COUNTER_KEYS = _HIT_KEYS.setdefault(("fonte", "query", "hits"), ("fonte", "query", "hits"))
+
+def configure_hit_context(mode: str = "full", cap: int = 0):
+    global HIT_CONTEXT_MODE, HIT_CONTEXT_CAP
+    HIT_CONTEXT_MODE = mode
+    HIT_CONTEXT_CAP = max(0, int(cap or 0))
+
+def _count_hits(hits: Iterable[Any]) -> Dict[Tuple[str, str], int]:
+    counts: Dict[Tuple[str, str], int] = {}
+    for h in hits:
+        if isinstance(h, tuple) and h[0] is _COUNTER_KEYS:
+            k, n = (h[1], h[2]), h[3]
+        else:
+            d = unpack_hit(h)
+            k = (d.get("fonte") or "", d.get("query") or d.get("lookfor") or d.get("mode") or "")
+            n = int(d.get("hits") or 1)
+        counts[k] = counts.get(k, 0) + n
+    return counts
+
+def compact_hit_context(hits: List[Any]) -> List[Any]:
+    """
+    Aplica o modo de hit_context: no "counter", agrega as ocorrências em contadores
+    {fonte, query, hits} (o excedente de HIT_CONTEXT_CAP vai para fonte/query "*");
+    no "full", só corta a lista no limite, se houver.
+    """
+    cap = HIT_CONTEXT_CAP
+    if HIT_CONTEXT_MODE != "counter":
+        return hits[:cap] if cap and len(hits) > cap else hits
+    counts = _count_hits(hits)
+    if cap and len(counts) > cap:
+        other = counts.pop(HIT_OVERFLOW, 0)
+        items = list(counts.items())
+        other += sum(n for _, n in items[cap - 1:])
+        counts = dict(items[:cap - 1])
+        counts[HIT_OVERFLOW] = other
+    return [(_COUNTER_KEYS, sys.intern(f), sys.intern(q), n) for (f, q), n in counts.items()]
+
+def as_record(rec: Union[Record, Dict[str, Any]]) -> Record:
+    """Cópia rasa como Record (registros lidos de JSON/NDJSON chegam como dict)."""
+    return rec.copy() if isinstance(rec, Record) else Record.from_dict(rec)
+
+def record_json(rec: Union[Record, Dict[str, Any]], **kwargs) -> str:
+    return json.dumps(rec.to_dict() if isinstance(rec, Record) else rec, ensure_ascii=False, **kwargs)
+
 def make_record(descritor_base: Union[str, List[str]],
                 consulta: Union[str, List[str]],
                 fonte: str, tipo: str, ano: Optional[int],
                 titulo: str, autores: str, resumo: str, doi: str, link: str,
-                hit_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    rec = {
-        "descritor": descritor_base,
-        "consulta": consulta,
-        "fonte": fonte,
-        "fontes": [fonte],
-        "tipo": tipo or "",
-        "ano": int(ano) if (isinstance(ano, int) or (isinstance(ano, str) and str(ano).isdigit())) else "",
-        "titulo": titulo or "",
-        "autores": autores or "",
-        "resumo": resumo or "",
-        "doi": (doi or "").lower(),
-        "link": link or "",
-        "hit_context": [hit_context] if hit_context else []
-    }
-    return rec
+                hit_context: Optional[Dict[str, Any]] = None) -> Record:
+    return Record(
+        descritor=descritor_base,
+        consulta=consulta,
+        fonte=fonte,
+        fontes=[fonte],
+        tipo=tipo or "",
+        ano=int(ano) if (isinstance(ano, int) or (isinstance(ano, str) and str(ano).isdigit())) else "",
+        titulo=titulo or "",
+        autores=autores or "",
+        resumo=resumo or "",
+        doi=(doi or "").lower(),
+        link=link or "",
+        hit_context=[hit_context] if hit_context else [],
+    )
 
 def prefer_type(t1: str, t2: str) -> str:
     ranking = {"thesis": 3, "dissertation": 3, "journal-article": 2, "article": 2,
@@ -434,7 +1341,7 @@ def merge_records(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
     if not a.get("link") or (not is_pdf(a.get("link","")) and is_pdf(b.get("link",""))):
         if b.get("link"): a["link"] = b["link"]
     if not a.get("doi") and b.get("doi"): a["doi"] = b["doi"]
-    a["hit_context"] = (a.get("hit_context") or []) + (b.get("hit_context") or [])
+    a["hit_context"] = compact_hit_context((a.get("hit_context") or []) + (b.get("hit_context") or []))
     return a
 
 def dedupe_key(r: Dict[str, Any]) -> str:
@@ -450,286 +1357,1721 @@ def dedupe(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         if key in merged:
             merged[key] = merge_records(merged[key], r)
         else:
-            merged[key] = dict(r)
+            merged[key] = as_record(r)
     return list(merged.values())
 
-# ============ Checkpoint/Streaming ============
-class CheckpointManager:
-    def __init__(self, out_json: str, out_ndjson: Optional[str], checkpoint_seconds: int,
-                 checkpoint_records: int, resume: bool):
+# ============ Quase-duplicatas (sem DOI) ============
+FUZZY_NUM_PERM = 16      # MinHash: 4 bandas × 4 linhas
+FUZZY_BANDS = 4
+FUZZY_THRESHOLD = 0.8    # Jaccard mínimo entre os tokens dos títulos
+FUZZY_CONTAINMENT = 0.9  # título truncado / sem subtítulo contido no outro
+FUZZY_BUCKET_CAP = 50    # comparações por balde (evita blocos gigantes quadráticos)
+FUZZY_STOPWORDS = frozenset("""
+a o as os e de do da dos das em no na nos nas um uma uns umas por para com sem sobre entre ao aos
+the of and in on for to an at by from with el la los las del y en por para con
+""".split())
+_FUZZY_TOKEN_RE = re.compile(r"[^\W_]+")
+
+def _title_tokens(titulo: str, fold: Dict[str, str]) -> List[str]:
+    out = []
+    for w in _FUZZY_TOKEN_RE.findall(normalize_title(titulo)):
+        f = fold.get(w)
+        if f is None:
+            f = fold[w] = strip_accents(w)
+        if len(f) > 1 and f not in FUZZY_STOPWORDS:
+            out.append(f)
+    return out
+
+def _author_surnames(autores: str, fold: Dict[str, str]) -> frozenset:
+    out = set()
+    for nm in (autores or "").split(";"):
+        nm = nm.strip().lower()
+        if not nm: continue
+        # "Sobrenome, Nome" ou "Nome Sobrenome"
+        last = (nm.split(",")[0] if "," in nm else nm.split()[-1]).strip()
+        f = fold.get(last)
+        if f is None:
+            f = fold[last] = strip_accents(last)
+        if len(f) > 1: out.add(f)
+    return frozenset(out)
+
+def _token_hashes(tok: str) -> Tuple[int, ...]:
+    b = tok.encode("utf-8")
+    h = hashlib.blake2b(b, digest_size=4 * FUZZY_NUM_PERM, salt=b"qs-minhash").digest()
+    return struct.unpack(f"<{FUZZY_NUM_PERM}I", h)
+
+def _is_near_duplicate(a: Dict[str, Any], b: Dict[str, Any], ta: frozenset, tb: frozenset,
+                       sa: frozenset, sb: frozenset, threshold: float) -> bool:
+    da, db = (a.get("doi") or "").lower(), (b.get("doi") or "").lower()
+    if da and db and da != db:
+        return False
+    ya, yb = a.get("ano"), b.get("ano")
+    if isinstance(ya, int) and isinstance(yb, int) and abs(ya - yb) > 1:
+        return False
+    if sa and sb and not (sa & sb):
+        return False
+    inter = len(ta & tb)
+    if not inter:
+        return False
+    small = min(len(ta), len(tb))
+    if small < 3:
+        return ta == tb and bool(sa & sb)
+    if inter / len(ta | tb) >= threshold:
+        return True
+    return inter / small >= FUZZY_CONTAINMENT
+
+def near_duplicate_clusters(records: List[Dict[str, Any]], threshold: float = FUZZY_THRESHOLD) -> List[List[int]]:
+    """
+    Agrupa registros quase duplicados (acentos, subtítulos, títulos truncados, ano ±1)
+    em tempo subquadrático: MinHash/LSH sobre os tokens do título mais um bloco pelo
+    prefixo de 3 tokens; só os pares que caem no mesmo balde são verificados.
+    Pares com DOIs diferentes nunca são unidos. Devolve grupos (índices) com 2+ itens.
+    """
+    rows = FUZZY_NUM_PERM // FUZZY_BANDS
+    fold: Dict[str, str] = {}
+    tok_cache: Dict[str, Tuple[int, ...]] = {}
+    token_sets: List[frozenset] = []
+    surnames: List[frozenset] = []
+    buckets: Dict[Any, List[int]] = {}
+    for i, r in enumerate(records):
+        toks = _title_tokens(r.get("titulo", ""), fold)
+        ts = frozenset(toks)
+        token_sets.append(ts)
+        surnames.append(_author_surnames(r.get("autores", ""), fold))
+        if not ts:
+            continue
+        sigs = []
+        for t in ts:
+            h = tok_cache.get(t)
+            if h is None:
+                h = tok_cache[t] = _token_hashes(t)
+            sigs.append(h)
+        mh = tuple(map(min, zip(*sigs))) if len(sigs) > 1 else sigs[0]
+        for b in range(FUZZY_BANDS):
+            buckets.setdefault((b, mh[b * rows:(b + 1) * rows]), []).append(i)
+        if len(toks) >= 3:
+            buckets.setdefault(("p",) + tuple(toks[:3]), []).append(i)
+
+    parent = list(range(len(records)))
+    # DOI de cada grupo: dois grupos com DOIs diferentes nunca se unem (nem por transitividade)
+    group_doi = [(r.get("doi") or "").lower() for r in records]
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for members in buckets.values():
+        if len(members) < 2: continue
+        for pos in range(1, len(members)):
+            i = members[pos]
+            for j in members[max(0, pos - FUZZY_BUCKET_CAP):pos]:
+                ri, rj = find(i), find(j)
+                if ri == rj: continue
+                if group_doi[ri] and group_doi[rj] and group_doi[ri] != group_doi[rj]:
+                    continue
+                if _is_near_duplicate(records[i], records[j], token_sets[i], token_sets[j],
+                                      surnames[i], surnames[j], threshold):
+                    parent[ri] = rj
+                    group_doi[rj] = group_doi[rj] or group_doi[ri]
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(records)):
+        groups.setdefault(find(i), []).append(i)
+    return [g for g in groups.values() if len(g) > 1]
+
+def fuzzy_dedupe(records: List[Dict[str, Any]], threshold: float = FUZZY_THRESHOLD) -> List[Dict[str, Any]]:
+    """Funde cada grupo de quase-duplicatas com merge_records (registro com DOI como base)."""
+    clusters = near_duplicate_clusters(records, threshold)
+    if not clusters:
+        return records
+    absorbed = set()
+    out = list(records)
+    for g in clusters:
+        g = sorted(g, key=lambda i: (not records[i].get("doi"), i))
+        base = as_record(records[g[0]])
+        for i in g[1:]:
+            base = merge_records(base, records[i])
+            absorbed.add(i)
+        out[g[0]] = base
+    return [r for i, r in enumerate(out) if i not in absorbed]
+
+# ============ Armazenamento de registros ============
+
+def write_json_array(path: str, records: Iterable[Dict[str, Any]], compact: bool = False) -> int:
+    """
+    Grava a lista de registros em streaming (tmp + rename), no mesmo formato de
+    json.dump(..., indent=2), sem precisar da lista inteira em memória. Com
+    compact=True, cada registro vai numa linha, sem indentação (JSON válido do mesmo jeito).
+    """
+    tmp = path + ".tmp"
+    n = 0
+    with open(tmp, "w", encoding="utf-8") as f:
+        for rec in records:
+            if compact:
+                f.write(("[\n" if n == 0 else ",\n") + record_json(rec, separators=(",", ":")))
+            else:
+                body = record_json(rec, indent=2).replace("\n", "\n  ")
+                f.write(("[\n  " if n == 0 else ",\n  ") + body)
+            n += 1
+        f.write("\n]" if n else "[]")
+    os.replace(tmp, path)
+    return n
+
+class JsonRecordStore:
+    """
+    Índice deduplicado (dedupe_key → registro) em memória. Cada checkpoint só
+    acrescenta os registros recebidos a um diário append-only (<out_json>.delta.jsonl);
+    o JSON consolidado é escrito uma única vez, em finalize(). Se a execução cair, o
+    diário é reaplicado sobre o último JSON consolidado na próxima inicialização.
+    """
+    name = "json"
+
+    def __init__(self, out_json: str, compact: bool = False):
         self.out_json = out_json
-        self.out_ndjson = out_ndjson
-        self.checkpoint_seconds = checkpoint_seconds
-        self.checkpoint_records = checkpoint_records
-        self.last_flush = time.time()
-        self.records_since = 0
-        self.buffer: List[Dict[str, Any]] = []
-        self.seen = set()
-        if resume:
-            self._preseed_seen()
-        self.ndjson_fh = None
-        if self.out_ndjson:
-            self.ndjson_fh = open(self.out_ndjson, "a", encoding="utf-8")
+        self.compact = compact
+        self.delta_path = out_json + ".delta.jsonl"
+        self.index: Dict[str, Dict[str, Any]] = {}
+        self.pending: List[Dict[str, Any]] = []
+        self.dirty = False
+        self._load()
 
-    def _preseed_seen(self):
+    def _merge(self, rec: Dict[str, Any]) -> bool:
+        key = dedupe_key(rec)
+        if key in self.index:
+            self.index[key] = merge_records(self.index[key], rec)
+            return False
+        rec = self.index[key] = as_record(rec)
+        if HIT_CONTEXT_MODE == "counter" or HIT_CONTEXT_CAP:
+            rec["hit_context"] = compact_hit_context(rec.hit_context)
+        return True
+
+    def _load(self):
         if os.path.exists(self.out_json):
             try:
                 data = json.load(open(self.out_json, "r", encoding="utf-8"))
                 for r in data if isinstance(data, list) else []:
-                    self.seen.add(dedupe_key(r))
-            except Exception:
-                pass
-        if self.out_ndjson and os.path.exists(self.out_ndjson):
-            try:
-                with open(self.out_ndjson, "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        if not line: continue
-                        try:
-                            r = json.loads(line)
-                            self.seen.add(dedupe_key(r))
-                        except Exception:
-                            continue
+                    self._merge(r)
             except Exception:
                 pass
+        if os.path.exists(self.delta_path):
+            # diário de uma execução interrompida antes do finalize()
+            replayed = 0
+            with open(self.delta_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line: continue
+                    try:
+                        self._merge(json.loads(line))
+                        replayed += 1
+                    except Exception:
+                        continue
+            if replayed:
+                self.dirty = True
+                print(f"[checkpoint] diário reaplicado: {replayed} registros de {self.delta_path}")
 
-    def add(self, rec: Dict[str, Any]):
-        key = dedupe_key(rec)
-        if key in self.seen:
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def contains(self, key: str) -> bool:
+        return key in self.index
+
+    def keys(self, start: int = 0) -> Iterable[str]:
+        """Chaves na ordem de inserção, a partir da posição start."""
+        return islice(self.index.keys(), start, None)
+
+    def last_key(self) -> Optional[str]:
+        return next(reversed(self.index), None)
+
+    def upsert(self, rec: Dict[str, Any]) -> bool:
+        self.pending.append(rec)
+        return self._merge(rec)
+
+    def checkpoint(self) -> str:
+        if not self.pending:
+            return ""
+        with open(self.delta_path, "a", encoding="utf-8") as f:
+            for rec in self.pending:
+                f.write(record_json(rec) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        n, self.pending = len(self.pending), []
+        self.dirty = True
+        return f"+{n} registros → {self.delta_path}"
+
+    def records(self) -> Iterable[Dict[str, Any]]:
+        return iter(self.index.values())
+
+    def finalize(self, records: Optional[List[Dict[str, Any]]] = None) -> bool:
+        self.checkpoint()
+        if records is None and not (self.dirty or not os.path.exists(self.out_json)):
             return False
-        self.seen.add(key)
-        self.buffer.append(rec)
-        self.records_since += 1
-        if self.ndjson_fh:
-            self.ndjson_fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
-            self.ndjson_fh.flush()
-        now = time.time()
-        if (self.checkpoint_records and self.records_since >= self.checkpoint_records) or \
-           (self.checkpoint_seconds and now - self.last_flush >= self.checkpoint_seconds):
-            self.flush_snapshot()
+        write_json_array(self.out_json, self.records() if records is None else records, self.compact)
+        if os.path.exists(self.delta_path):
+            os.remove(self.delta_path)
+        self.dirty = False
         return True
 
-    def flush_snapshot(self):
-        if not self.buffer:
-            self.last_flush = time.time()
-            self.records_since = 0
-            return
-        existing = []
-        if os.path.exists(self.out_json):
-            try:
-                existing = json.load(open(self.out_json, "r", encoding="utf-8"))
-                if not isinstance(existing, list): existing = []
-            except Exception:
-                existing = []
-        agg = existing + self.buffer
-        final = dedupe(agg)
-        tmp = self.out_json + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(final, f, ensure_ascii=False, indent=2)
-        os.replace(tmp, self.out_json)
-        print(f"[checkpoint] snapshot salvo → {self.out_json} (total atual: {len(final)} registros)")
-        self.buffer = []
-        self.last_flush = time.time()
-        self.records_since = 0
+    def close(self):
+        pass
 
-    def finalize(self):
+class SqliteRecordStore:
+    """
+    Registros em SQLite: tabela records (uma linha por dedupe_key, com índice único),
+    sources (fontes de cada registro) e hit_context (uma linha por ocorrência).
+    upsert() aplica merge_records dentro do banco; cada checkpoint é um commit e o
+    JSON consolidado é exportado em streaming no finalize().
+    """
+    name = "sqlite"
+
+    def __init__(self, path: str, out_json: str, compact: bool = False):
+        self.path = path
+        self.out_json = out_json
+        self.compact = compact
+        self.dirty = False
+        self.pending = 0
+        # no modo --async quem grava é a thread de escrita (uma só por vez)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY,
+                dedupe_key TEXT NOT NULL,
+                descritor TEXT, consulta TEXT, fonte TEXT, tipo TEXT, ano,
+                titulo TEXT, autores TEXT, resumo TEXT, doi TEXT, link TEXT);
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_records_dedupe_key ON records(dedupe_key);
+            CREATE TABLE IF NOT EXISTS sources (
+                record_id INTEGER NOT NULL REFERENCES records(id),
+                fonte TEXT NOT NULL,
+                UNIQUE(record_id, fonte));
+            CREATE TABLE IF NOT EXISTS hit_context (
+                id INTEGER PRIMARY KEY,
+                record_id INTEGER NOT NULL REFERENCES records(id),
+                ctx TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS idx_hit_context_record ON hit_context(record_id);
+        """)
+        self.conn.commit()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def contains(self, key: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM records WHERE dedupe_key=?", (key,)).fetchone() is not None
+
+    def keys(self, start: int = 0) -> Iterable[str]:
+        for (k,) in self.conn.execute("SELECT dedupe_key FROM records ORDER BY id LIMIT -1 OFFSET ?", (start,)):
+            yield k
+
+    def last_key(self) -> Optional[str]:
+        row = self.conn.execute("SELECT dedupe_key FROM records ORDER BY id DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _dump(v: Any) -> str:
+        return json.dumps(v, ensure_ascii=False)
+
+    def _row_to_record(self, row: tuple, fontes: List[str], hits: List[Dict[str, Any]]) -> Record:
+        return Record(descritor=json.loads(row[1]), consulta=json.loads(row[2]), fonte=row[3],
+                      fontes=fontes, tipo=row[4], ano=row[5], titulo=row[6], autores=row[7],
+                      resumo=row[8], doi=row[9], link=row[10], hit_context=hits)
+
+    def upsert(self, rec: Dict[str, Any]) -> bool:
+        key = dedupe_key(rec)
+        cur = self.conn.cursor()
+        row = cur.execute("SELECT id, descritor, consulta, fonte, tipo, ano, titulo, autores, resumo, doi, link "
+                          "FROM records WHERE dedupe_key=?", (key,)).fetchone()
+        self.pending += 1
+        self.dirty = True
+        if row is None:
+            cur.execute("INSERT INTO records (dedupe_key, descritor, consulta, fonte, tipo, ano, titulo, autores, "
+                        "resumo, doi, link) VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                        (key, self._dump(rec.get("descritor")), self._dump(rec.get("consulta")), rec.get("fonte", ""),
+                         rec.get("tipo", ""), rec.get("ano", ""), rec.get("titulo", ""), rec.get("autores", ""),
+                         rec.get("resumo", ""), rec.get("doi", ""), rec.get("link", "")))
+            rid = cur.lastrowid
+            fontes = rec.get("fontes") or ([rec["fonte"]] if rec.get("fonte") else [])
+            hits = rec.get("hit_context") or []
+            is_new = True
+        else:
+            rid = row[0]
+            fontes_old = [f for (f,) in cur.execute("SELECT fonte FROM sources WHERE record_id=? ORDER BY rowid", (rid,))]
+            # hit_context já gravado não precisa ser relido: merge_records apenas concatena
+            merged = merge_records(self._row_to_record(row, fontes_old, []), rec)
+            cur.execute("UPDATE records SET descritor=?, consulta=?, fonte=?, tipo=?, ano=?, autores=?, resumo=?, "
+                        "doi=?, link=? WHERE id=?",
+                        (self._dump(merged["descritor"]), self._dump(merged["consulta"]), merged.get("fonte", ""),
+                         merged.get("tipo", ""), merged.get("ano", ""), merged.get("autores", ""),
+                         merged.get("resumo", ""), merged.get("doi", ""), merged.get("link", ""), rid))
+            fontes = merged.get("fontes") or []
+            hits = merged.get("hit_context") or []
+            is_new = False
+        cur.executemany("INSERT OR IGNORE INTO sources (record_id, fonte) VALUES (?,?)", [(rid, f) for f in fontes])
+        cur.executemany("INSERT INTO hit_context (record_id, ctx) VALUES (?,?)", [(rid, self._dump(unpack_hit(h))) for h in hits])
+        return is_new
+
+    def checkpoint(self) -> str:
+        if not self.pending:
+            return ""
+        self.conn.commit()
+        n, self.pending = self.pending, 0
+        return f"commit de {n} registros → {self.path}"
+
+    def records(self) -> Iterable[Dict[str, Any]]:
+        src = self.conn.execute("SELECT record_id, fonte FROM sources ORDER BY record_id, rowid")
+        hit = self.conn.execute("SELECT record_id, ctx FROM hit_context ORDER BY record_id, id")
+        nxt_src, nxt_hit = src.fetchone(), hit.fetchone()
+        for row in self.conn.execute("SELECT id, descritor, consulta, fonte, tipo, ano, titulo, autores, resumo, "
+                                     "doi, link FROM records ORDER BY id"):
+            rid = row[0]
+            fontes: List[str] = []
+            while nxt_src is not None and nxt_src[0] <= rid:
+                if nxt_src[0] == rid: fontes.append(nxt_src[1])
+                nxt_src = src.fetchone()
+            hits: List[Dict[str, Any]] = []
+            while nxt_hit is not None and nxt_hit[0] <= rid:
+                if nxt_hit[0] == rid: hits.append(json.loads(nxt_hit[1]))
+                nxt_hit = hit.fetchone()
+            # as linhas guardam cada ocorrência; o modo de hit_context vale para a saída
+            yield self._row_to_record(row, fontes, compact_hit_context(hits))
+
+    def finalize(self, records: Optional[List[Dict[str, Any]]] = None) -> bool:
+        self.checkpoint()
+        if records is None and not (self.dirty or not os.path.exists(self.out_json)):
+            return False
+        write_json_array(self.out_json, self.records() if records is None else records, self.compact)
+        self.dirty = False
+        return True
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+def open_record_store(kind: str, out_json: str, db_path: Optional[str] = None, compact: bool = False):
+    if kind == "sqlite":
+        return SqliteRecordStore(db_path or (os.path.splitext(out_json)[0] + ".sqlite"), out_json, compact)
+    return JsonRecordStore(out_json, compact)
+
+# ============ Formatos de saída ============
+NDJSON_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+def ndjson_codec(path: str, codec: Optional[str] = None) -> str:
+    """Compressão do NDJSON: a pedida explicitamente ou a indicada pela extensão (.gz/.zst)."""
+    if codec:
+        return codec
+    for c, suffix in NDJSON_SUFFIXES.items():
+        if path.endswith(suffix):
+            return c
+    return "none"
+
+def open_ndjson(path: str, mode: str, codec: Optional[str] = None):
+    """Abre o NDJSON em modo texto ("a" ou "r"), comprimido ou não; gzip e zstd aceitam append (multi-frame)."""
+    codec = ndjson_codec(path, codec)
+    if codec == "gzip":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if codec == "zstd":
+        if not _HAS_ZSTD:
+            raise RuntimeError("NDJSON zstd requer o pacote zstandard (pip install zstandard)")
+        return zstandard.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+def export_table(path: str, records: List[Record]) -> int:
+    """
+    Exporta o conjunto final em formato colunar: Parquet, ou Arrow IPC/Feather se a
+    extensão for .arrow/.feather. descritor/consulta/fontes viram listas de texto;
+    hit_context vai como JSON (estrutura varia por fonte).
+    """
+    import pyarrow as pa
+
+    def as_list(v: Any) -> List[str]:
+        return v if isinstance(v, list) else ([v] if v else [])
+
+    cols: Dict[str, List[Any]] = {k: [] for k in RECORD_FIELDS}
+    for r in records:
+        for k in ("descritor", "consulta", "fontes"):
+            cols[k].append(as_list(r.get(k)))
+        for k in ("fonte", "tipo", "titulo", "autores", "resumo", "doi", "link"):
+            cols[k].append(r.get(k) or "")
+        ano = r.get("ano")
+        cols["ano"].append(ano if isinstance(ano, int) else None)
+        hits = r.hits() if isinstance(r, Record) else (r.get("hit_context") or [])
+        cols["hit_context"].append(json.dumps(hits, ensure_ascii=False))
+    text_list = pa.list_(pa.string())
+    schema = pa.schema([(k, text_list if k in ("descritor", "consulta", "fontes") else
+                         pa.int32() if k == "ano" else pa.string()) for k in RECORD_FIELDS])
+    table = pa.Table.from_pydict(cols, schema=schema)
+    if path.endswith((".arrow", ".feather")):
+        import pyarrow.feather as feather
+        feather.write_feather(table, path, compression="zstd")
+    else:
+        import pyarrow.parquet as pq
+        pq.write_table(table, path, compression="zstd")
+    return table.num_rows
+
+# ============ Índice do visualizador (result.html) ============
+VIEWER_INDEX_DIR = "indice_visualizador"
+VIEWER_SHARD_SIZE = 1000
+VIEWER_TEXT_FIELDS = ("titulo", "autores", "descritor")   # índice invertido por palavra
+VIEWER_COLUMNS = ("descritor", "fonte", "tipo", "titulo", "autores", "doi")
+_VIEWER_MARKS_RE = re.compile("[\u0300-\u036f]")
+_VIEWER_TOKEN_RE = re.compile(r"[^\W_]+")
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def viewer_fold(s: str) -> str:
+    """A mesma dobra do normalize() do result.html: NFD, sem U+0300–U+036F, minúsculas."""
+    return _VIEWER_MARKS_RE.sub("", unicodedata.normalize("NFD", s)).lower()
+
+def _viewer_text(v: Any) -> str:
+    if isinstance(v, list):
+        return "; ".join(str(x) for x in v if x)
+    return "" if v is None else str(v)
+
+def _js_order(t: str) -> bytes:
+    # o visualizador faz busca binária com "<" do JavaScript, que compara unidades UTF-16
+    return t.encode("utf-16-be")
+
+def export_viewer_index(out_dir: str, records: Iterable[Dict[str, Any]],
+                        shard_size: int = VIEWER_SHARD_SIZE) -> int:
+    """
+    Exporta o conjunto final para o result.html filtrar sem normalizar nada no navegador:
+      manifest.json       contagem, tamanho e nomes dos blocos
+      records-NNNN.json   registros em blocos de shard_size (carregados por página)
+      columns.json        colunas de busca já dobradas (sem acento, minúsculas) + ano + chave
+      index.json          palavra → ids (título, autores, descritor), listas por fonte/tipo/ano
+    O id de um registro é a sua posição no conjunto final.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    for name in os.listdir(out_dir):
+        if name.startswith("records-") and name.endswith(".json"):
+            os.remove(os.path.join(out_dir, name))
+
+    def dump(name: str, obj: Any):
+        with open(os.path.join(out_dir, name), "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False, separators=(",", ":"))
+
+    cols: Dict[str, List[Any]] = {k: [] for k in VIEWER_COLUMNS + ("ano", "key")}
+    tokens: Dict[str, Dict[str, List[int]]] = {f: {} for f in VIEWER_TEXT_FIELDS}
+    facets: Dict[str, Dict[str, List[int]]] = {"fonte": {}, "tipo": {}, "ano": {}}
+    shards: List[str] = []
+    shard: List[Dict[str, Any]] = []
+    n = 0
+    for i, r in enumerate(records):
+        d = r.to_dict() if isinstance(r, Record) else dict(r)
+        d.pop("hit_context", None)
+        shard.append(d)
+        if len(shard) >= shard_size:
+            shards.append(f"records-{len(shards):04d}.json")
+            dump(shards[-1], shard)
+            shard = []
+        for k in VIEWER_COLUMNS:
+            cols[k].append(viewer_fold(_viewer_text(d.get(k))))
+        ano = d.get("ano")
+        ano = ano if isinstance(ano, int) else (int(ano) if str(ano or "").isdigit() else 0)
+        cols["ano"].append(ano)
+        # mesma chave do recordKey() do visualizador (rótulos e exclusões no localStorage)
+        doi = (d.get("doi") or "").lower().strip()
+        cols["key"].append("doi:" + doi if doi else
+                           "t+" + viewer_fold(d.get("titulo") or "") + "|" + (str(d["ano"]) if d.get("ano") else ""))
+        for f in VIEWER_TEXT_FIELDS:
+            for tok in set(_VIEWER_TOKEN_RE.findall(cols[f][i])):
+                tokens[f].setdefault(tok, []).append(i)
+        facets["fonte"].setdefault(cols["fonte"][i], []).append(i)
+        facets["tipo"].setdefault(cols["tipo"][i], []).append(i)
+        facets["ano"].setdefault(str(ano) if ano else "", []).append(i)
+        n += 1
+    if shard:
+        shards.append(f"records-{len(shards):04d}.json")
+        dump(shards[-1], shard)
+
+    fields = {}
+    for f, post in tokens.items():
+        terms = sorted(post, key=_js_order)
+        fields[f] = {"terms": terms, "postings": [post[t] for t in terms]}
+    dump("columns.json", cols)
+    # sem ordem pré-calculada: o result.html ordena com localeCompare, que o Python não reproduz
+    dump("index.json", {"fields": fields, "facets": facets})
+    # o manifesto vai por último: um índice pela metade não é visto como válido
+    dump("manifest.json", {"version": 1, "count": n, "shard_size": shard_size, "shards": shards,
+                           "columns": "columns.json", "index": "index.json",
+                           "gerado_em": dt.datetime.now().isoformat(timespec="seconds")})
+    return n
+
+# ============ Chaves vistas (conjunto compacto) ============
+SEEN_SUFFIX = ".seen"
+SEEN_MAGIC = b"SEEN\x01\x00\x00\x00"
+SEEN_PENDING_MIN = 65536
+SEEN_DELTA_SUFFIX = ".delta"
+
+def seen_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+class SeenSet:
+    """
+    Hashes de 64 bits (blake2b) das dedupe_keys: um array('Q') ordenado, consultado por
+    bisect, mais um set com as inclusões recentes, fundido no array quando passa de 1/4
+    dele. Um acerto é só candidato; a confirmação exata é de quem consulta
+    (CheckpointManager.is_seen). Em disco: o arquivo completo (save) mais um diário
+    (<arquivo>.delta) com os hashes incluídos desde então (append), relido por load().
+    """
+    __slots__ = ("base", "pending", "added")
+
+    def __init__(self, base: Optional[array] = None, pending: Iterable[int] = ()):
+        self.base = base if base is not None else array("Q")
+        self.pending = set(pending)
+        # inclusões ainda fora do disco (nem no arquivo completo nem no diário)
+        self.added = array("Q")
+
+    @classmethod
+    def from_hashes(cls, hashes: Iterable[int]) -> "SeenSet":
+        return cls(array("Q", sorted(set(hashes))))
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.pending)
+
+    def __contains__(self, h: int) -> bool:
+        if h in self.pending:
+            return True
+        i = bisect_left(self.base, h)
+        return i < len(self.base) and self.base[i] == h
+
+    def add(self, h: int):
+        if h in self:
+            return
+        self.pending.add(h)
+        self.added.append(h)
+        if len(self.pending) >= max(SEEN_PENDING_MIN, len(self.base) // 4):
+            self.compact()
+
+    def compact(self):
+        if self.pending:
+            # duas sequências já ordenadas: o timsort só as intercala
+            self.base = array("Q", sorted(chain(self.base, sorted(self.pending))))
+            self.pending = set()
+
+    def save(self, path: str, meta: Dict[str, Any]):
+        """Grava magic + cabeçalho JSON + hashes (array ordenado e pendentes, já ordenados). tmp + rename."""
+        pending = array("Q", sorted(self.pending))
+        header = json.dumps({**meta, "n": len(self.base), "m": len(pending),
+                             "byteorder": sys.byteorder}, ensure_ascii=False).encode("utf-8")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(SEEN_MAGIC + struct.pack("<I", len(header)) + header)
+            self.base.tofile(f)
+            pending.tofile(f)
+        os.replace(tmp, path)
+        # o arquivo completo já contém o diário
+        if os.path.exists(path + SEEN_DELTA_SUFFIX):
+            os.remove(path + SEEN_DELTA_SUFFIX)
+        self.added = array("Q")
+
+    def append(self, path: str, meta: Dict[str, Any]):
+        """Acrescenta ao diário os hashes incluídos desde a última gravação, com o meta do momento."""
+        header = json.dumps({**meta, "m": len(self.added)}, ensure_ascii=False).encode("utf-8")
+        with open(path + SEEN_DELTA_SUFFIX, "ab") as f:
+            f.write(struct.pack("<I", len(header)) + header)
+            self.added.tofile(f)
+        self.added = array("Q")
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["SeenSet", Dict[str, Any]]:
+        with open(path, "rb") as f:
+            if f.read(len(SEEN_MAGIC)) != SEEN_MAGIC:
+                raise ValueError("arquivo .seen inválido")
+            (hlen,) = struct.unpack("<I", f.read(4))
+            meta = json.loads(f.read(hlen).decode("utf-8"))
+            base, pending = array("Q"), array("Q")
+            base.fromfile(f, meta["n"])
+            pending.fromfile(f, meta["m"])
+        swap = meta.get("byteorder") != sys.byteorder
+        if swap:
+            base.byteswap(); pending.byteswap()
+        seen = cls(base, pending)
+        try:
+            with open(path + SEEN_DELTA_SUFFIX, "rb") as f:
+                # trecho cortado no fim (queda durante a gravação): vale o último inteiro
+                while True:
+                    raw = f.read(4)
+                    if len(raw) < 4: break
+                    (hlen,) = struct.unpack("<I", raw)
+                    chunk = json.loads(f.read(hlen).decode("utf-8"))
+                    hashes = array("Q")
+                    hashes.fromfile(f, chunk.pop("m"))
+                    if swap: hashes.byteswap()
+                    for h in hashes:
+                        seen.add(h)
+                    meta.update(chunk)
+        except (OSError, ValueError, EOFError, struct.error):
+            pass
+        seen.added = array("Q")
+        return seen, meta
+
+# ============ Checkpoint/Streaming ============
+class CheckpointManager:
+    """
+    Recebe os registros da busca e os grava no store (upsert com semântica de
+    merge_records). Registros com dedupe_key inédita vão também para o NDJSON; a cada
+    N registros novos ou T segundos o store faz um checkpoint barato (diário ou commit).
+    As chaves já vistas ficam num SeenSet salvo em <out_json>.seen: a cada checkpoint só
+    os hashes novos vão para o diário dele, e o arquivo completo é regravado no finalize().
+    Serve ao --resume, que não precisa reler o store e o NDJSON inteiros.
+    """
+    def __init__(self, out_json: str, out_ndjson: Optional[str], checkpoint_seconds: int,
+                 checkpoint_records: int, resume: bool, store=None, fuzzy: bool = False,
+                 fuzzy_threshold: float = FUZZY_THRESHOLD, hits_sidecar: Optional[str] = None,
+                 ndjson_compression: Optional[str] = None):
+        self.out_json = out_json
+        self.fuzzy = fuzzy
+        self.fuzzy_threshold = fuzzy_threshold
+        self.out_ndjson = out_ndjson
+        self.ndjson_codec = ndjson_codec(out_ndjson, ndjson_compression) if out_ndjson else "none"
+        self.checkpoint_seconds = checkpoint_seconds
+        self.checkpoint_records = checkpoint_records
+        self.resume = resume
+        self.last_flush = time.time()
+        self.records_since = 0
+        self.store = store if store is not None else JsonRecordStore(out_json)
+        # tamanho e última chave do store acompanhados a cada inclusão (vão para o meta do .seen)
+        self.store_len = len(self.store)
+        self.last_key = self.store.last_key()
+        self.seen = SeenSet()
+        # chaves que estão só no NDJSON (gravadas depois do último checkpoint do store): confirmação exata
+        self.seen_extra: set = set()
+        self.seen_path = out_json + SEEN_SUFFIX
+        self.seen_dirty = False
+        self.extra_dirty = False
+        if resume:
+            self.persist_seen = True
+            self._preseed_seen()
+        else:
+            # sem --resume, store/NDJSON anteriores não contam como vistos: o .seen só
+            # descreve a execução se ela começa do zero
+            self.persist_seen = self.store_len == 0 and self._ndjson_size() == 0
+            if self.persist_seen:
+                self.save_seen(full=True)
+            else:
+                for path in (self.seen_path, self.seen_path + SEEN_DELTA_SUFFIX):
+                    if os.path.exists(path):
+                        os.remove(path)
+        self.ndjson_fh = None
+        if self.out_ndjson:
+            self.ndjson_fh = open_ndjson(self.out_ndjson, "a", self.ndjson_codec)
+        # proveniência completa (uma linha por ocorrência), independente do modo do snapshot
+        self.sidecar_fh = open(hits_sidecar, "a", encoding="utf-8") if hits_sidecar else None
+
+    def _ndjson_size(self) -> int:
+        try:
+            return os.path.getsize(self.out_ndjson) if self.out_ndjson else 0
+        except OSError:
+            return 0
+
+    def _ndjson_keys(self, offset: int = 0) -> Iterable[str]:
+        """dedupe_keys do NDJSON; offset > 0 só para o NDJSON sem compressão."""
+        if not (self.out_ndjson and os.path.exists(self.out_ndjson)):
+            return
+        try:
+            # stream comprimido cortado no meio: fica o que foi lido até o erro
+            with open_ndjson(self.out_ndjson, "r", self.ndjson_codec) as f:
+                if offset:
+                    f.seek(offset)
+                for line in f:
+                    line = line.strip()
+                    if not line: continue
+                    try:
+                        yield dedupe_key(json.loads(line))
+                    except Exception:
+                        continue
+        except Exception:
+            pass
+
+    def _add_ndjson_keys(self, keys: Iterable[str]):
+        # o SQLite só guarda o que foi commitado; o NDJSON dele nunca foi relido na retomada
+        for key in keys:
+            if not self.store.contains(key):
+                self.seen_extra.add(key)
+                self.seen.add(seen_hash(key))
+
+    def _store_key_at(self, i: int) -> Optional[str]:
+        return next(iter(self.store.keys(i)), None) if i >= 0 else None
+
+    def _preseed_seen(self):
+        """
+        Carrega o .seen do último checkpoint e completa com o que veio depois dele (chaves
+        novas no fim do store, cauda do NDJSON); se ele não confere com store/NDJSON, refaz
+        a partir deles.
+        """
+        size, n_store = self._ndjson_size(), self.store_len
+        try:
+            seen, meta = SeenSet.load(self.seen_path)
+            offset, saved_len = meta.get("ndjson_size", 0), meta.get("store_len", -1)
+            # o store só cresce entre checkpoints: a chave na última posição gravada tem de ser a mesma
+            valid = (meta.get("store") == self.store.name and 0 <= saved_len <= n_store
+                     and self._store_key_at(saved_len - 1) == meta.get("last_key")
+                     and (offset == size or (offset < size and self.ndjson_codec == "none")))
+        except (OSError, ValueError, KeyError, EOFError):
+            valid = False
+        if valid:
+            self.seen = seen
+            self.seen_extra = set(meta.get("extra") or [])
+            n_extra = len(self.seen_extra)
+            for k in self.store.keys(saved_len):
+                self.seen.add(seen_hash(k))
+            if offset < size and not isinstance(self.store, SqliteRecordStore):
+                # registros que chegaram ao NDJSON depois do último checkpoint
+                self._add_ndjson_keys(self._ndjson_keys(offset))
+            print(f"[resume] {len(self.seen)} chaves carregadas de {self.seen_path}")
+            # o que foi completado aqui vai para o diário no próximo checkpoint
+            self.extra_dirty = len(self.seen_extra) != n_extra
+            self.seen_dirty = offset < size or saved_len < n_store
+        else:
+            self.seen = SeenSet.from_hashes(seen_hash(k) for k in self.store.keys())
+            if not isinstance(self.store, SqliteRecordStore):
+                self._add_ndjson_keys(self._ndjson_keys())
+            # sem base válida em disco: o diário precisa de um arquivo completo por baixo
+            self.save_seen(full=True)
+
+    def save_seen(self, full: bool = False):
+        """
+        Checkpoint: acrescenta ao diário do .seen os hashes novos (custo proporcional a
+        eles). full=True regrava o arquivo completo, absorvendo o diário.
+        """
+        if not self.persist_seen or not (full or self.seen_dirty):
+            return
+        meta = {"store": self.store.name, "store_len": self.store_len, "last_key": self.last_key,
+                "ndjson_size": self._ndjson_size()}
+        if full or self.extra_dirty:
+            meta["extra"] = sorted(self.seen_extra)
+        if full:
+            self.seen.save(self.seen_path, meta)
+        else:
+            self.seen.append(self.seen_path, meta)
+        self.seen_dirty = self.extra_dirty = False
+
+    def is_seen(self, key: str, h: Optional[int] = None) -> bool:
+        if (seen_hash(key) if h is None else h) not in self.seen:
+            return False
+        # hash presente: confirma pela chave (as vistas estão no store ou em seen_extra)
+        return key in self.seen_extra or self.store.contains(key)
+
+    def add(self, rec: Dict[str, Any]):
+        key = dedupe_key(rec)
+        if self.sidecar_fh:
+            for h in rec.get("hit_context") or []:
+                self.sidecar_fh.write(json.dumps({"key": key, **unpack_hit(h)}, ensure_ascii=False) + "\n")
+        h = seen_hash(key)
+        new = not self.is_seen(key, h)
+        if self.store.upsert(rec):
+            self.store_len += 1
+            self.last_key = key
+        if not new:
+            return False
+        self.seen.add(h)
+        self.seen_dirty = True
+        self.records_since += 1
+        if self.ndjson_fh:
+            self.ndjson_fh.write(record_json(rec) + "\n")
+            if self.ndjson_codec == "none":
+                # comprimido, flush por registro destruiria a taxa: fica para o checkpoint
+                self.ndjson_fh.flush()
+        now = time.time()
+        if (self.checkpoint_records and self.records_since >= self.checkpoint_records) or \
+           (self.checkpoint_seconds and now - self.last_flush >= self.checkpoint_seconds):
+            self.flush_snapshot()
+        return True
+
+    def flush_snapshot(self, log: bool = True, full: bool = True):
+        """
+        full=False (fim de cada página): só NDJSON e store. O diário do .seen fica para o
+        checkpoint por N registros/T segundos e para o finalize().
+        """
+        if self.ndjson_fh:
+            self.ndjson_fh.flush()
+        msg = self.store.checkpoint()
+        if msg and log:
+            print(f"[checkpoint] {msg} (total atual: {len(self.store)} registros)")
+        if not full:
+            return
+        self.save_seen()
+        self.last_flush = time.time()
+        self.records_since = 0
+
+    def records(self) -> List[Dict[str, Any]]:
+        return list(self.store.records())
+
+    def finalize(self) -> List[Dict[str, Any]]:
+        """Grava o JSON consolidado (com fusão de quase-duplicatas, se ativada) e o devolve."""
         self.flush_snapshot()
+        final = self.records()
+        override = None
+        if self.fuzzy:
+            n0 = len(final)
+            final = fuzzy_dedupe(final, self.fuzzy_threshold)
+            if len(final) != n0:
+                print(f"[dedupe] quase-duplicatas fundidas: {n0} → {len(final)} registros")
+                override = final
+        if self.store.finalize(override):
+            print(f"[checkpoint] snapshot salvo → {self.out_json} (total atual: {len(final)} registros)")
         if self.ndjson_fh:
+            # o fechamento grava o fim do stream comprimido; o tamanho no .seen acompanha
             self.ndjson_fh.close()
+        # fim da execução: o diário é absorvido pelo arquivo completo (o backfill também
+        # pode ter incluído chaves no store, por isso tamanho e última chave são relidos)
+        self.store_len, self.last_key = len(self.store), self.store.last_key()
+        self.save_seen(full=True)
+        self.store.close()
+        if self.sidecar_fh:
+            self.sidecar_fh.close()
+        return final
 
-# ============ SciELO ============
-def scielo_search(descritor_base: str, consulta: str, year_min: int, year_max: int,
-                  max_pages: int, enrich_max: int, enrich_timeout: float,
-                  delay: float, exact_phrase: bool, deadline_ts: Optional[float],
-                  debug: bool=False) -> Iterable[Dict[str, Any]]:
-    headers = {"User-Agent": USER_AGENT}
-    q = f"\"{consulta}\"" if exact_phrase else consulta
-    base = "https://search.scielo.org/?q={q}&lang=pt&count=50&from=1&output=site&format=summary&fb=&page={p}"
-    enriched = 0
-    def time_up(): return deadline_ts is not None and time.time() >= deadline_ts
-    def enrich_article(url: str) -> Tuple[str, str, str]:
-        out_doi, out_abs, out_tipo = "", "", ""
-        r = http_get(url, headers=headers, timeout=TIMEOUT, retries=1, backoff=1.4, debug=debug)
-        if not r: return out_doi, out_abs, out_tipo
-        soup = BeautifulSoup(r.text, "html.parser")
-        for name in ("citation_doi", "dc.identifier", "DC.identifier", "doi"):
-            m = soup.find("meta", attrs={"name": re.compile(name, re.I)})
-            if m and m.get("content"):
-                out_doi = pick_doi_from(m["content"])
-                if out_doi: break
-        if not out_doi:
-            out_doi = pick_doi_from(soup.get_text(" ", strip=True))
-        def grab(sel: str) -> str:
-            node = soup.select_one(sel)
-            return clean_text(node.get_text(" ", strip=True)) if node else ""
-        for sel in ["section#abstract p", "div#abstract p", "div.abstract p", "div.resumo p", "div#resumo p",
-                    "div#content .abstract p"]:
-            out_abs = grab(sel)
-            if out_abs: break
-        if not out_abs:
-            node = soup.find(class_=re.compile("abstract|resumo", re.I))
-            if node: out_abs = clean_text(node.get_text(" ", strip=True))
-        txt = soup.get_text(" ", strip=True).lower()
-        if not out_tipo:
-            if any(k in txt for k in ["thesis", "tese", "doutor"]):
-                out_tipo = "thesis"
-            elif any(k in txt for k in ["dissertação", "dissertacao", "mestrado"]):
-                out_tipo = "dissertation"
+# ============ Progresso por página ============
+class PageMark:
+    """
+    Emitido pelos buscadores ao fim de cada página, depois de todos os registros dela.
+    next_state é o ponto de retomada (página, cursor ou offset); done indica que a
+    unidade descritor × variante × fonte não tem mais páginas a buscar. score é o maior
+    score de relevância da página, quando a fonte informa.
+    """
+    __slots__ = ("fonte", "descritor", "consulta", "next_state", "done", "score")
+
+    def __init__(self, fonte: str, descritor: str, consulta: str,
+                 next_state: Optional[Dict[str, Any]], done: bool, score: Optional[float] = None):
+        self.fonte = fonte
+        self.descritor = descritor
+        self.consulta = consulta
+        self.next_state = next_state
+        self.done = done
+        self.score = score
+
+def release_marks(marks: List[Tuple[int, PageMark]], pending: List[Tuple[Future, Dict[str, Any], Any, int]]) -> Iterable[PageMark]:
+    """Libera as marcas das páginas que não têm mais registros aguardando enriquecimento."""
+    first_open = min((p[3] for p in pending), default=None)
+    keep = []
+    for page, mark in marks:
+        if first_open is None or page < first_open:
+            yield mark
+        else:
+            keep.append((page, mark))
+    marks[:] = keep
+
+# ============ Paginação adaptativa ============
+class PageBudget:
+    """
+    Orçamento de páginas de uma unidade descritor × variante × fonte. watch() acompanha
+    o que o buscador emite (registros e PageMarks) e mede, por página, a fração de
+    dedupe_keys inéditas e a queda do score de relevância; o buscador pergunta more()
+    antes de cada página. Abaixo dos limites a unidade para; depois do orçamento nominal
+    ela só segue com páginas que outras unidades da mesma fonte deixaram de usar.
+    """
+    __slots__ = ("pager", "fonte", "descritor", "consulta", "nominal", "fetched",
+                 "keys", "new", "total", "first_score", "low", "stop_reason", "refused")
+
+    def __init__(self, pager: "AdaptivePager", fonte: str, descritor: str, consulta: str, nominal: int):
+        self.pager = pager
+        self.fonte = fonte
+        self.descritor = descritor
+        self.consulta = consulta
+        self.nominal = max(1, nominal)
+        self.fetched = 0
+        self.keys: set = set()
+        self.new = 0
+        self.total = 0
+        self.first_score: Optional[float] = None
+        self.low = 0
+        self.stop_reason = ""
+        self.refused = False
+
+    def more(self, pages_done: int) -> bool:
+        """Pode buscar a próxima página? pages_done conta as páginas já feitas (inclusive antes de um --resume)."""
+        if self.stop_reason:
+            allowed = False
+        elif pages_done < self.nominal:
+            allowed = True
+        elif pages_done >= self.nominal * ADAPTIVE_MAX_FACTOR:
+            allowed = False
+        else:
+            allowed = self.pager.borrow(self.fonte)
+        self.fetched = pages_done + 1 if allowed else pages_done
+        self.refused = not allowed
+        return allowed
+
+    def see(self, rec: Dict[str, Any]):
+        # só o hash: a conferência exata não importa para uma taxa
+        h = seen_hash(dedupe_key(rec))
+        self.total += 1
+        if h not in self.keys and h not in self.pager.seen:
+            self.new += 1
+        self.keys.add(h)
+
+    def page_done(self, mark: PageMark):
+        p = self.pager
+        if mark.score is not None:
+            if self.first_score is None:
+                self.first_score = mark.score
+            elif self.first_score > 0 and mark.score < p.relevance_floor * self.first_score:
+                self.stop_reason = self.stop_reason or "relevância"
+        if self.total:
+            self.low = self.low + 1 if self.new / self.total < p.novelty_min else 0
+            if self.low >= p.patience:
+                self.stop_reason = self.stop_reason or "novidade"
+        self.new = self.total = 0
+
+    def watch(self, items: Iterable[Any]) -> Iterable[Any]:
+        done = False
+        for item in items:
+            if isinstance(item, PageMark):
+                done = done or item.done
+                self.page_done(item)
+            else:
+                self.see(item)
+            yield item
+        if self.refused and not done:
+            # o buscador parou por orçamento: a unidade conta como concluída
+            done = True
+            yield PageMark(self.fonte, self.descritor, self.consulta, None, True)
+        if done:
+            self.pager.release(self)
+
+    async def awatch(self, items: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        done = False
+        async for item in items:
+            if isinstance(item, PageMark):
+                done = done or item.done
+                self.page_done(item)
             else:
-                out_tipo = "journal-article"
-        return out_doi, out_abs, out_tipo
+                self.see(item)
+            yield item
+        if self.refused and not done:
+            done = True
+            yield PageMark(self.fonte, self.descritor, self.consulta, None, True)
+        if done:
+            self.pager.release(self)
+
+class AdaptivePager:
+    """
+    Paginação adaptativa (--adaptive-pages). Cria um PageBudget por unidade e guarda,
+    por fonte, as páginas do orçamento nominal (*_MAX_PAGES) que unidades encerradas
+    antes do fim não usaram; elas vão para as unidades que ainda trazem obras novas.
+    O total de páginas por fonte nunca passa de *_MAX_PAGES × unidades.
+    """
+    def __init__(self, seen: "SeenSet", novelty_min: float = ADAPTIVE_NOVELTY_MIN,
+                 relevance_floor: float = ADAPTIVE_RELEVANCE_FLOOR, patience: int = ADAPTIVE_PATIENCE):
+        self.seen = seen
+        self.novelty_min = novelty_min
+        self.relevance_floor = relevance_floor
+        self.patience = max(1, patience)
+        self.spare: Dict[str, int] = {}
+        self.cut: Dict[str, int] = {}
+        self.saved = 0
+        self.borrowed = 0
+        self.lock = threading.Lock()
+
+    def unit(self, fonte: str, descritor: str, consulta: str, nominal: int) -> PageBudget:
+        return PageBudget(self, fonte, descritor, consulta, nominal)
+
+    def borrow(self, fonte: str) -> bool:
+        with self.lock:
+            if self.spare.get(fonte, 0) <= 0:
+                return False
+            self.spare[fonte] -= 1
+            self.borrowed += 1
+            return True
+
+    def release(self, b: PageBudget):
+        unused = max(0, b.nominal - b.fetched)
+        with self.lock:
+            self.spare[b.fonte] = self.spare.get(b.fonte, 0) + unused
+            if b.stop_reason:
+                self.cut[b.stop_reason] = self.cut.get(b.stop_reason, 0) + 1
+                self.saved += unused
+
+    def summary(self) -> str:
+        cut = ", ".join(f"{k}: {v}" for k, v in sorted(self.cut.items())) or "nenhuma"
+        return (f"unidades encerradas cedo ({cut}); {self.saved} páginas poupadas, "
+                f"{self.borrowed} remanejadas para consultas ainda produtivas")
+
+def pages_left(pager: Optional[PageBudget], pages_done: int, max_pages: int) -> bool:
+    return pages_done < max_pages if pager is None else pager.more(pages_done)
+
+def last_page(pager: Optional[PageBudget], pages_done: int, max_pages: int) -> bool:
+    # com --adaptive-pages, quem encerra a unidade pelo orçamento é o PageBudget
+    return pager is None and pages_done >= max_pages
+
+# ============ Enriquecimento em pool ============
+class EnrichmentPool:
+    """
+    Estágio de enriquecimento separado da paginação: os buscadores submetem as
+    buscas de DOI/resumo/PDF e seguem para a próxima página. O pool tem um número
+    fixo de workers e um teto de requisições simultâneas por host.
+    """
+    def __init__(self, workers: int, per_host: int = ENRICH_PER_HOST):
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="enrich")
+        self.per_host = max(1, per_host)
+        self.host_sems: Dict[str, threading.BoundedSemaphore] = {}
+        self.lock = threading.Lock()
+
+    def _sem(self, url: str) -> threading.BoundedSemaphore:
+        host = (urlparse(url).netloc or "").lower()
+        with self.lock:
+            sem = self.host_sems.get(host)
+            if sem is None:
+                sem = self.host_sems[host] = threading.BoundedSemaphore(self.per_host)
+            return sem
+
+    def submit(self, url: str, fn, *args, **kwargs) -> Future:
+        sem = self._sem(url)
+        def task():
+            with sem:
+                return fn(*args, **kwargs)
+        return self.executor.submit(task)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+def drain_enrichment(pending: List[Tuple[Future, Dict[str, Any], Any, int]], block: bool) -> Iterable[Dict[str, Any]]:
+    """
+    Entrega os registros cujo enriquecimento terminou (todos, se block=True), aplicando
+    o resultado com apply(rec, resultado). Os itens entregues saem de pending.
+    """
+    keep = []
+    for item in pending:
+        fut, rec, apply, _page = item
+        if not block and not fut.done():
+            keep.append(item)
+            continue
+        try:
+            res = fut.result()
+        except Exception as e:
+            print(f"[AVISO] enriquecimento falhou ({rec.get('link', '')}): {e}")
+            res = None
+        if res is not None:
+            apply(rec, res)
+        yield rec
+    pending[:] = keep
+
+# ============ Livro de trabalho (retomada fina) ============
+class WorkLedger:
+    """
+    Diário append-only (<out_json>.ledger.jsonl) das páginas concluídas por unidade
+    descritor × variante × fonte, com o ponto de retomada de cada uma (página SciELO/BDTD,
+    next_cursor da OpenAlex, offset do Crossref). Com --resume, unidades concluídas são
+    puladas e as demais recomeçam da primeira página pendente. A primeira linha guarda a
+    assinatura dos parâmetros de busca; se eles mudarem, o diário anterior é descartado.
+    """
+    def __init__(self, path: str, signature: Dict[str, Any], resume: bool):
+        self.path = path
+        self.signature = signature
+        self.units: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self.skipped = 0
+        if resume and os.path.exists(path):
+            self._load()
+        fresh = not self.units
+        self.fh = open(path, "w" if fresh else "a", encoding="utf-8")
+        if fresh:
+            self.fh.write(json.dumps({"signature": signature}, ensure_ascii=False) + "\n")
+            self.fh.flush()
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for i, line in enumerate(f):
+                line = line.strip()
+                if not line: continue
+                try:
+                    entry = json.loads(line)
+                except Exception:
+                    continue
+                if i == 0:
+                    if entry.get("signature") != self.signature:
+                        print(f"[resume] parâmetros de busca mudaram; ignorando {self.path}")
+                        return
+                    continue
+                key = (entry.get("descritor", ""), entry.get("consulta", ""), entry.get("fonte", ""))
+                self.units[key] = {"next": entry.get("next"), "done": bool(entry.get("done"))}
+        done = sum(1 for u in self.units.values() if u["done"])
+        print(f"[resume] ledger: {done} unidades concluídas, {len(self.units) - done} em andamento")
 
-    for page in range(1, max_pages + 1):
-        if STOP_REQUESTED or time_up(): break
-        url = base.format(q=quote(q), p=page)
-        r = http_get(url, headers=headers, timeout=TIMEOUT, retries=2, backoff=1.5, debug=debug)
+    def get(self, descritor: str, consulta: str, fonte: str) -> Optional[Dict[str, Any]]:
+        return self.units.get((descritor, consulta, fonte))
+
+    def mark(self, pm: PageMark):
+        self.units[(pm.descritor, pm.consulta, pm.fonte)] = {"next": pm.next_state, "done": pm.done}
+        self.fh.write(json.dumps({"descritor": pm.descritor, "consulta": pm.consulta, "fonte": pm.fonte,
+                                  "next": pm.next_state, "done": pm.done}, ensure_ascii=False) + "\n")
+        self.fh.flush()
+
+    def close(self):
+        self.fh.close()
+
+# ============ Paginação das fontes ============
+class PageStep:
+    """
+    Paginação de uma unidade descritor × variante × fonte, sem I/O. next_request() abre
+    a página e diz o que buscar (None: não há próxima); parse()/aparse() convertem a
+    resposta; accept() recebe cada item convertido e diz se ele vai para o
+    enriquecimento; finish() fecha a página com o PageMark (None: a unidade para sem
+    marca). iter_pages() e aiter_pages() fazem a rede, o parsing e o enriquecimento.
+    """
+    fonte = ""
+    retries, backoff, stream = 2, 1.4, True
+    item_paths: Tuple[str, ...] = ()
+    meta_paths: Tuple[str, ...] = ()
+
+    def __init__(self, descritor_base: str, consulta: str, max_pages: int,
+                 pager: Optional[PageBudget], debug: bool):
+        self.descritor = descritor_base
+        self.consulta = consulta
+        self.max_pages = max_pages
+        self.pager = pager
+        self.debug = debug
+        self.headers = {"User-Agent": USER_AGENT}
+        self.done = False
+        self.top: Optional[float] = None
+
+    def next_request(self) -> Optional[Tuple[str, Optional[Dict[str, Any]]]]:
+        raise NotImplementedError
+
+    def build(self) -> tuple:
+        """(build, *args) de page_items para as fontes JSON."""
+        raise NotImplementedError
+
+    def parse(self, r) -> Union[BuiltItems, ParsedPage]:
+        return page_items(r, self.item_paths, self.meta_paths, *self.build())
+
+    async def aparse(self, r) -> Union[BuiltItems, ParsedPage]:
+        return await page_items_async(r, self.item_paths, self.meta_paths, *self.build())
+
+    def accept(self, item: Any) -> Tuple[Dict[str, Any], Optional[str]]:
+        """(registro, URL a enriquecer ou None). Por padrão, item é (registro, score)."""
+        rec, score = item
+        if score is not None: self.top = max(self.top or 0.0, score)
+        return rec, None
+
+    def enrich(self, url: str) -> Any:
+        return None
+
+    async def aenrich(self, url: str) -> Any:
+        return None
+
+    def apply(self, rec: Dict[str, Any], res: Any):
+        pass
+
+    def still_needs(self, rec: Dict[str, Any], url: str) -> bool:
+        """Se o registro guardado ainda precisa da página de origem (sem adiamento de DOI)."""
+        return False
+
+    def rescrape(self, rec: Dict[str, Any], url: str) -> Optional[Record]:
+        """
+        Raspa a página de um registro adiado para o lote da OpenAlex que ele não completou.
+        Devolve um registro parcial com o mesmo DOI, para fundir via merge_records.
+        """
+        if not self.still_needs(rec, url):
+            return None
+        part = make_record([], [], "", rec.get("tipo") or "", None, "", "", "", rec["doi"], "", None)
+        self.apply(part, self.enrich(url))
+        part["doi"] = rec["doi"]  # a chave de deduplicação não muda
+        return part
+
+    def finish(self, page: Union[BuiltItems, ParsedPage], n: int) -> Optional[PageMark]:
+        raise NotImplementedError
+
+    def mark(self, next_state: Optional[Dict[str, Any]], done: bool) -> PageMark:
+        if next_state is None:
+            self.done = True
+        top, self.top = self.top, None
+        return PageMark(self.fonte, self.descritor, self.consulta, next_state, done, top)
+
+def deadline_check(deadline_ts: Optional[float]):
+    return lambda: STOP_REQUESTED or (deadline_ts is not None and time.time() >= deadline_ts)
+
+def iter_pages(step: PageStep, time_up, enricher: Optional[EnrichmentPool] = None) -> Iterable[Any]:
+    """
+    Modo síncrono: registros em streaming; o enriquecimento vai para o pool (se houver)
+    e o PageMark de uma página só sai depois dos registros dela.
+    """
+    pending: List[Tuple[Future, Dict[str, Any], Any, int]] = []
+    marks: List[Tuple[int, PageMark]] = []
+    for seq in count():
+        req = None if time_up() else step.next_request()
+        if req is None: break
+        url, params = req
+        r = http_get(url, headers=step.headers, timeout=TIMEOUT, retries=step.retries, backoff=step.backoff,
+                     debug=step.debug, params=params, stream=step.stream)
         if not r: break
-        soup = BeautifulSoup(r.text, "html.parser")
-        items = soup.find_all("div", class_="item")
-        if not items: break
-
-        for it in items:
-            if STOP_REQUESTED or time_up(): break
-            title_tag = it.find("strong", class_="title")
-            titulo = title_tag.get_text(strip=True) if title_tag else ""
-            a_parent = title_tag.find_parent("a") if title_tag else None
-            link = a_parent["href"] if (a_parent and a_parent.has_attr("href")) else ""
-
-            authors = it.find("div", class_="line authors")
-            autores = authors.get_text(" ", strip=True) if authors else ""
-
-            source = it.find("div", class_="line source")
-            ano = None
-            if source:
-                m = re.search(r"\b(19|20)\d{2}\b", source.get_text())
-                if m: ano = int(m.group())
-
-            resumo = ""
-            for ab in it.find_all("div", class_="abstract"):
-                cand = clean_text(ab.get_text(strip=True))
-                if cand:
-                    resumo = cand
-                    break
+        page = step.parse(r)
+        n = 0
+        interrupted = False
+        for item in page:
+            if time_up():
+                interrupted = True
+                break
+            n += 1
+            rec, link = step.accept(item)
+            if link:
+                if enricher is not None:
+                    pending.append((enricher.submit(link, step.enrich, link), rec, step.apply, seq))
+                    continue
+                step.apply(rec, step.enrich(link))
+            yield rec
+        mark = None if interrupted or time_up() else step.finish(page, n)
+        if mark is None: break
+        marks.append((seq, mark))
+        yield from drain_enrichment(pending, block=False)
+        yield from release_marks(marks, pending)
+        if step.done: break
+    yield from drain_enrichment(pending, block=True)
+    yield from release_marks(marks, pending)
 
-            doi = pick_doi_from(titulo, autores)
-            tipo = "journal-article"
+async def aiter_pages(step: PageStep, time_up, enrich_page) -> AsyncIterator[Any]:
+    """Modo async: o mesmo passo; o enriquecimento da página sai junto (enrich_page), antes dos registros."""
+    while True:
+        req = None if time_up() else step.next_request()
+        if req is None: return
+        url, params = req
+        r = await http_get_async(url, headers=step.headers, timeout=TIMEOUT, retries=step.retries,
+                                 backoff=step.backoff, debug=step.debug, params=params)
+        if not r: return
+        page = await step.aparse(r)
+        recs: List[Dict[str, Any]] = []
+        todo: List[Tuple[Dict[str, Any], str]] = []
+        interrupted = False
+        for item in page:
+            if time_up():
+                interrupted = True
+                break
+            rec, link = step.accept(item)
+            if link: todo.append((rec, link))
+            recs.append(rec)
+        await enrich_page(step, todo)
+        for rec in recs:
+            yield rec
+        mark = None if interrupted or time_up() else step.finish(page, len(recs))
+        if mark is None: return
+        yield mark
+        if step.done: return
 
-            if ano and (ano < year_min or ano > year_max):
-                continue
+# ============ SciELO ============
+# casa "item" também em class="item clearfix" (o strainer vê o atributo bruto)
+SCIELO_ITEM_STRAINER = SoupStrainer("div", class_=re.compile(r"(^|\s)item(\s|$)"))
+
+SCIELO_SEARCH_URL = ("https://search.scielo.org/?q={q}&lang=pt&count=50&from=1&output=site"
+                     "&format=summary&fb=&page={p}")
+
+def scielo_article_fields(markup: str) -> Tuple[str, str, str]:
+    """DOI, resumo e tipo a partir da página do artigo."""
+    out_doi, out_abs, out_tipo = "", "", ""
+    soup = make_soup(markup)
+    page = PageText(soup)
+    for name in ("citation_doi", "dc.identifier", "DC.identifier", "doi"):
+        m = soup.find("meta", attrs={"name": re.compile(name, re.I)})
+        if m and m.get("content"):
+            out_doi = pick_doi_from(m["content"])
+            if out_doi: break
+    if not out_doi:
+        out_doi = pick_doi_from(page.text)
+    def grab(sel: str) -> str:
+        node = soup.select_one(sel)
+        return clean_text(node.get_text(" ", strip=True)) if node else ""
+    for sel in ["section#abstract p", "div#abstract p", "div.abstract p", "div.resumo p", "div#resumo p",
+                "div#content .abstract p"]:
+        out_abs = grab(sel)
+        if out_abs: break
+    if not out_abs:
+        node = soup.find(class_=re.compile("abstract|resumo", re.I))
+        if node: out_abs = clean_text(node.get_text(" ", strip=True))
+    txt = page.lower
+    if not out_tipo:
+        if any(k in txt for k in ["thesis", "tese", "doutor"]):
+            out_tipo = "thesis"
+        elif any(k in txt for k in ["dissertação", "dissertacao", "mestrado"]):
+            out_tipo = "dissertation"
+        else:
+            out_tipo = "journal-article"
+    return out_doi, out_abs, out_tipo
+
+def scielo_enrich(url: str, debug: bool = False) -> Tuple[str, str, str]:
+    r = http_get(url, headers={"User-Agent": USER_AGENT}, timeout=TIMEOUT, retries=1, backoff=1.4, debug=debug)
+    return parse_call(scielo_article_fields, r.text) if r else ("", "", "")
+
+async def scielo_enrich_async(url: str, debug: bool = False) -> Tuple[str, str, str]:
+    r = await http_get_async(url, headers={"User-Agent": USER_AGENT}, timeout=TIMEOUT, retries=1, backoff=1.4, debug=debug)
+    return await parse_call_async(scielo_article_fields, r.text) if r else ("", "", "")
+
+def scielo_apply_enrichment(rec: Dict[str, Any], res: Tuple[str, str, str]):
+    d2, a2, t2 = res
+    if d2: rec["doi"] = d2.lower()
+    if a2 and not rec["resumo"]: rec["resumo"] = a2
+    if t2: rec["tipo"] = t2
+
+def scielo_page_items(markup: str) -> List[Tag]:
+    # a listagem só precisa dos blocos de resultado
+    return make_soup(markup, SCIELO_ITEM_STRAINER).find_all("div", class_="item")
+
+def scielo_item_record(it: Tag, descritor_base: str, q: str, page: int,
+                       year_min: int, year_max: int) -> Optional[Record]:
+    """Registro de um bloco da listagem; None quando o ano cai fora do intervalo."""
+    title_tag = it.find("strong", class_="title")
+    titulo = title_tag.get_text(strip=True) if title_tag else ""
+    a_parent = title_tag.find_parent("a") if title_tag else None
+    link = a_parent["href"] if (a_parent and a_parent.has_attr("href")) else ""
+
+    authors = it.find("div", class_="line authors")
+    autores = authors.get_text(" ", strip=True) if authors else ""
+
+    source = it.find("div", class_="line source")
+    ano = None
+    if source:
+        m = re.search(r"\b(19|20)\d{2}\b", source.get_text())
+        if m: ano = int(m.group())
+
+    resumo = ""
+    for ab in it.find_all("div", class_="abstract"):
+        cand = clean_text(ab.get_text(strip=True))
+        if cand:
+            resumo = cand
+            break
+
+    doi = pick_doi_from(titulo, autores)
+    tipo = "journal-article"
+
+    if ano and (ano < year_min or ano > year_max):
+        return None
+
+    hit_ctx = {"fonte": "SciELO", "endpoint": "search.scielo.org", "query": q, "page": page}
+    return make_record(descritor_base, q, "SciELO", tipo, ano, titulo, autores, resumo, doi, link, hit_ctx)
+
+def scielo_parse_listing(markup: str, descritor_base: str, q: str, page: int,
+                         year_min: int, year_max: int) -> Tuple[int, List[Record]]:
+    """(nº de blocos na listagem, registros dentro do intervalo de anos)."""
+    items = scielo_page_items(markup)
+    recs = (scielo_item_record(it, descritor_base, q, page, year_min, year_max) for it in items)
+    return len(items), [rec for rec in recs if rec is not None]
+
+def scielo_needs_enrich(rec: Dict[str, Any], defer_doi: bool) -> bool:
+    # com defer_doi, quem já tem DOI é completado depois pelo lote da OpenAlex
+    return bool(rec["link"]) and (not rec["doi"] or (not rec["resumo"] and not defer_doi))
+
+class ScieloPages(PageStep):
+    fonte = "scielo"
+    retries, backoff, stream = 2, 1.5, False
+
+    def __init__(self, descritor_base: str, consulta: str, year_min: int, year_max: int,
+                 max_pages: int, enrich_max: int, enrich_timeout: float, exact_phrase: bool,
+                 debug: bool = False, start_state: Optional[Dict[str, Any]] = None,
+                 defer_doi: bool = False, pager: Optional[PageBudget] = None,
+                 deferred: Optional[Dict[str, Tuple[PageStep, str]]] = None):
+        super().__init__(descritor_base, consulta, max_pages, pager, debug)
+        self.years = (year_min, year_max)
+        self.q = f"\"{consulta}\"" if exact_phrase else consulta
+        self.defer_doi = defer_doi
+        self.deferred = deferred
+        self.page = int((start_state or {}).get("page") or 1)
+        # o que sobrou do orçamento de enriquecimento segue no estado: a retomada enriquece os mesmos registros
+        self.enrich_left = int((start_state or {}).get("enrich_left", enrich_max))
+
+    def next_request(self):
+        if not pages_left(self.pager, self.page - 1, self.max_pages): return None
+        return SCIELO_SEARCH_URL.format(q=quote(self.q), p=self.page), None
 
-            hit_ctx = {"fonte": "SciELO", "endpoint": "search.scielo.org", "query": q, "page": page}
+    def parse(self, r):
+        n_items, recs = parse_call(scielo_parse_listing, r.text, self.descritor, self.q, self.page, *self.years)
+        return ParsedPage(recs, {"items": n_items}, False)
 
-            if (not doi or not resumo) and enrich_max > 0 and link and not time_up():
-                d2, a2, t2 = enrich_article(link)
-                if d2: doi = d2
-                if a2 and not resumo: resumo = a2
-                if t2: tipo = t2
-                enrich_max -= 1
+    async def aparse(self, r):
+        n_items, recs = await parse_call_async(scielo_parse_listing, r.text, self.descritor, self.q, self.page,
+                                               *self.years)
+        return ParsedPage(recs, {"items": n_items}, False)
 
-            yield make_record(descritor_base, q, "SciELO", tipo, ano, titulo, autores, resumo, doi, link, hit_ctx)
-        sleep_with_jitter(delay)
+    def accept(self, rec):
+        if scielo_needs_enrich(rec, self.defer_doi):
+            if self.enrich_left > 0:
+                self.enrich_left -= 1
+                return rec, rec["link"]
+        elif self.deferred is not None and self.enrich_left > 0 and self.still_needs(rec, rec["link"]):
+            # adiado para o lote da OpenAlex; se ele não completar, scrape_deferred() raspa
+            self.deferred[dedupe_key(rec)] = (self, rec["link"])
+        return rec, None
+
+    def still_needs(self, rec, url):
+        return scielo_needs_enrich(rec, False)
+
+    def enrich(self, url):
+        return scielo_enrich(url, self.debug)
+
+    async def aenrich(self, url):
+        return await scielo_enrich_async(url, self.debug)
+
+    def apply(self, rec, res):
+        scielo_apply_enrichment(rec, res)
+
+    def finish(self, page, n):
+        if not page.meta["items"]:
+            return self.mark(None, True)
+        self.page += 1
+        return self.mark({"page": self.page, "enrich_left": self.enrich_left},
+                         last_page(self.pager, self.page - 1, self.max_pages))
+
+def scielo_search(descritor_base: str, consulta: str, year_min: int, year_max: int,
+                  max_pages: int, enrich_max: int, enrich_timeout: float,
+                  exact_phrase: bool, deadline_ts: Optional[float],
+                  debug: bool=False, enricher: Optional[EnrichmentPool] = None,
+                  start_state: Optional[Dict[str, Any]] = None,
+                  defer_doi: bool = False, pager: Optional[PageBudget] = None,
+                  deferred: Optional[Dict[str, Tuple[PageStep, str]]] = None) -> Iterable[Any]:
+    step = ScieloPages(descritor_base, consulta, year_min, year_max, max_pages, enrich_max, enrich_timeout,
+                       exact_phrase, debug, start_state, defer_doi, pager, deferred)
+    return iter_pages(step, deadline_check(deadline_ts), enricher)
 
 # ============ OpenAlex ============
-def openalex_search(descritor_base: str, consulta: str, year_min: int, year_max: int,
-                    per_page: int, max_pages: int, delay: float,
-                    title_search: bool, deadline_ts: Optional[float], debug: bool=False) -> Iterable[Dict[str, Any]]:
+def openalex_doi(w: Dict[str, Any]) -> str:
+    return (w.get("doi") or "").replace("https://doi.org/", "").lower()
+
+def _rebuild_abstract_sorted(inv: Dict[str, List[int]]) -> str:
+    words = []
+    for word, idxs in inv.items():
+        for i in idxs:
+            words.append((i, word))
+    words.sort(key=lambda x: x[0])
+    return clean_text(" ".join([w for _, w in words]))
+
+def rebuild_abstract(inv: Optional[Dict[str, List[int]]]) -> str:
+    """
+    Remonta o resumo a partir do abstract_inverted_index. As posições são uma
+    permutação de 0..n-1, então cada palavra vai direto para o seu slot numa lista
+    pré-alocada (O(n), sem tuplas nem sort). Lacunas, posições repetidas ou
+    negativas caem na ordenação estável, que dá o mesmo texto de antes.
+    """
+    if not inv:
+        return ""
+    positions = inv.values()
+    n = sum(map(len, positions))
+    slots: List[Optional[str]] = [None] * n
+    try:
+        for word, idxs in inv.items():
+            for i in idxs:
+                slots[i] = word
+    except (IndexError, TypeError):
+        return _rebuild_abstract_sorted(inv)
+    # todos os slots cheios e soma 0+1+…+(n-1): nenhuma posição repetida ou negativa
+    if None in slots or sum(chain.from_iterable(positions)) != n * (n - 1) // 2:
+        return _rebuild_abstract_sorted(inv)
+    return clean_text(" ".join(slots))
+
+def openalex_record(w: Dict[str, Any], descritor_base: Union[str, List[str]],
+                    consulta: Union[str, List[str]], fonte: str,
+                    hit_ctx: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    titulo = w.get("display_name") or ""
+    ano = w.get("publication_year")
+    tipo = (w.get("type") or "").lower() or "article"
+    auths = []
+    for au in (w.get("authorships") or []):
+        nm = (au.get("author") or {}).get("display_name")
+        if nm: auths.append(nm)
+    autores = "; ".join(auths)
+    link = ""
+    pl = w.get("primary_location") or {}
+    if pl.get("landing_page_url"):
+        link = pl["landing_page_url"]
+    elif w.get("open_access") and (w["open_access"] or {}).get("oa_url"):
+        link = w["open_access"]["oa_url"]
+    resumo = rebuild_abstract(w.get("abstract_inverted_index"))
+    return make_record(descritor_base, consulta, fonte, tipo, ano, titulo, autores, resumo,
+                       openalex_doi(w), link, hit_ctx)
+
+def needs_backfill(rec: Dict[str, Any]) -> bool:
+    """Registro com DOI, fora da OpenAlex, ainda sem resumo/autores/ano/tipo definido."""
+    if not rec.get("doi") or "OpenAlex" in (rec.get("fontes") or []):
+        return False
+    return (not rec.get("resumo") or not rec.get("autores") or not rec.get("ano")
+            or (rec.get("tipo") or "") in ("", "thesis/dissertation"))
+
+def openalex_backfill(records: Iterable[Dict[str, Any]], batch_size: int = OPENALEX_BATCH_SIZE,
+                      time_up=None, debug: bool = False) -> Iterable[Dict[str, Any]]:
+    """
+    Resolve na OpenAlex, em lotes (filter=doi:a|b|…, select= só com os campos usados),
+    os DOIs dos registros que precisam de complemento. Devolve registros parciais com o
+    mesmo DOI (sem descritor/consulta/fonte) para fundir via merge_records.
+    """
     headers = {"User-Agent": USER_AGENT}
-    cursor = "*"
-    pages = 0
-    def time_up(): return deadline_ts is not None and time.time() >= deadline_ts
-    filt = f"from_publication_date:{year_min}-01-01,to_publication_date:{year_max}-12-31,language:pt|en|es"
-    while pages < max_pages and cursor and not STOP_REQUESTED and not time_up():
-        if title_search:
-            url = (f"https://api.openalex.org/works"
-                   f"?filter={quote(filt)},title.search:{quote(consulta)}"
-                   f"&per_page={per_page}&cursor={quote(cursor)}")
-            qmode = "title.search"
-        else:
-            url = (f"https://api.openalex.org/works"
-                   f"?search={quote(consulta)}&filter={quote(filt)}"
-                   f"&per_page={per_page}&cursor={quote(cursor)}")
-            qmode = "search"
+    # vírgula e barra vertical são separadores da sintaxe de filtro
+    dois = list(dict.fromkeys(rec["doi"].strip() for rec in records if needs_backfill(rec)
+                              and not any(c in rec["doi"] for c in ",|")))
+    for i in range(0, len(dois), batch_size):
+        if STOP_REQUESTED or (time_up is not None and time_up()):
+            break
+        batch = dois[i:i + batch_size]
+        url = (f"https://api.openalex.org/works"
+               f"?filter={quote('doi:' + '|'.join(batch))}"
+               f"&select={OPENALEX_SELECT}&per_page={len(batch)}")
         r = http_get(url, headers=headers, timeout=TIMEOUT, retries=2, backoff=1.4, debug=debug)
-        if not r: break
-        data = r.json()
-        results = data.get("results", [])
-        if not results: break
+        if not r: continue
+        try:
+            results = r.json().get("results") or []
+        except Exception:
+            continue
+        wanted = set(batch)
         for w in results:
-            if STOP_REQUESTED or time_up(): break
-            titulo = w.get("display_name") or ""
-            ano = w.get("publication_year")
-            tipo = (w.get("type") or "").lower() or "article"
-            doi = (w.get("doi") or "").replace("https://doi.org/", "").lower()
-            auths = []
-            for au in (w.get("authorships") or []):
-                nm = (au.get("author") or {}).get("display_name")
-                if nm: auths.append(nm)
-            autores = "; ".join(auths)
-            link = ""
-            pl = w.get("primary_location") or {}
-            if pl.get("landing_page_url"):
-                link = pl["landing_page_url"]
-            elif w.get("open_access") and (w["open_access"] or {}).get("oa_url"):
-                link = w["open_access"]["oa_url"]
-            resumo = ""
-            inv = w.get("abstract_inverted_index")
-            if inv:
-                words = []
-                for word, idxs in inv.items():
-                    for _ in idxs:
-                        words.append((_, word))
-                words.sort(key=lambda x: x[0])
-                resumo = clean_text(" ".join([w for _, w in words]))
-            hit_ctx = {"fonte": "OpenAlex", "endpoint": "api.openalex.org/works",
-                       "mode": qmode, "query": consulta, "cursor": cursor}
-            yield make_record(descritor_base, consulta, "OpenAlex", tipo, ano, titulo, autores, resumo, doi, link, hit_ctx)
-        cursor = (data.get("meta") or {}).get("next_cursor")
-        pages += 1
-        sleep_with_jitter(delay)
+            doi = openalex_doi(w)
+            if doi not in wanted:
+                continue
+            wanted.discard(doi)
+            hit_ctx = {"fonte": "OpenAlex", "endpoint": "api.openalex.org/works", "mode": "doi.backfill"}
+            yield openalex_record(w, [], [], "", hit_ctx)
+
+def openalex_search_url(consulta: str, year_min: int, year_max: int, per_page: int,
+                        cursor: str, title_search: bool, fast: bool) -> Tuple[str, str]:
+    """URL de uma página da busca e o modo (search/title.search) anotado no hit_context."""
+    # modo rápido: só os campos que openalex_record lê
+    select = f"&select={OPENALEX_SELECT}" if fast else ""
+    filt = f"from_publication_date:{year_min}-01-01,to_publication_date:{year_max}-12-31,language:pt|en|es"
+    if title_search:
+        return (f"https://api.openalex.org/works"
+                f"?filter={quote(filt)},title.search:{quote(consulta)}"
+                f"&per_page={per_page}&cursor={quote(cursor)}{select}"), "title.search"
+    return (f"https://api.openalex.org/works"
+            f"?search={quote(consulta)}&filter={quote(filt)}"
+            f"&per_page={per_page}&cursor={quote(cursor)}{select}"), "search"
+
+def openalex_hit(qmode: str, consulta: str, cursor: str) -> Dict[str, Any]:
+    return {"fonte": "OpenAlex", "endpoint": "api.openalex.org/works",
+            "mode": qmode, "query": consulta, "cursor": cursor}
+
+def openalex_scored_record(w: Dict[str, Any], *args) -> Tuple[Record, Optional[float]]:
+    return openalex_record(w, *args), w.get("relevance_score")
+
+class OpenAlexPages(PageStep):
+    fonte = "openalex"
+    item_paths, meta_paths = ("results",), ("meta.next_cursor",)
+
+    def __init__(self, descritor_base: str, consulta: str, year_min: int, year_max: int,
+                 per_page: int, max_pages: int, title_search: bool, debug: bool = False,
+                 start_state: Optional[Dict[str, Any]] = None, fast: bool = False,
+                 pager: Optional[PageBudget] = None):
+        super().__init__(descritor_base, consulta, max_pages, pager, debug)
+        self.years = (year_min, year_max)
+        self.per_page = per_page
+        self.title_search = title_search
+        # OPENALEX_SELECT não traz relevance_score: com o corte por relevância (--adaptive-pages),
+        # a página vem inteira para o score chegar ao PageBudget
+        self.select = fast and (pager is None or pager.pager.relevance_floor <= 0)
+        self.cursor = (start_state or {}).get("cursor") or "*"
+        self.pages = int((start_state or {}).get("pages") or 0)
+        self.qmode = ""
+
+    def next_request(self):
+        if not self.cursor or not pages_left(self.pager, self.pages, self.max_pages): return None
+        url, self.qmode = openalex_search_url(self.consulta, *self.years, self.per_page, self.cursor,
+                                              self.title_search, self.select)
+        return url, None
+
+    def build(self):
+        return (openalex_scored_record, self.descritor, self.consulta, "OpenAlex",
+                openalex_hit(self.qmode, self.consulta, self.cursor))
+
+    def finish(self, page, n):
+        if page.error: return None
+        if not n:
+            return self.mark(None, True)
+        self.cursor = page.meta.get("meta.next_cursor")
+        self.pages += 1
+        return self.mark({"cursor": self.cursor, "pages": self.pages},
+                         not self.cursor or last_page(self.pager, self.pages, self.max_pages))
+
+def openalex_search(descritor_base: str, consulta: str, year_min: int, year_max: int,
+                    per_page: int, max_pages: int,
+                    title_search: bool, deadline_ts: Optional[float], debug: bool=False,
+                    start_state: Optional[Dict[str, Any]] = None, fast: bool = False,
+                    pager: Optional[PageBudget] = None) -> Iterable[Any]:
+    step = OpenAlexPages(descritor_base, consulta, year_min, year_max, per_page, max_pages, title_search,
+                         debug, start_state, fast, pager)
+    return iter_pages(step, deadline_check(deadline_ts))
 
 # ============ Crossref ============
-def crossref_search(descritor_base: str, consulta: str, year_min: int, year_max: int,
-                    rows: int, max_pages: int, delay: float, mailto: Optional[str],
-                    title_search: bool, deadline_ts: Optional[float], debug: bool=False) -> Iterable[Dict[str, Any]]:
-    headers = {"User-Agent": f"{USER_AGENT} mailto:{mailto}" if mailto else USER_AGENT}
+CROSSREF_API = "https://api.crossref.org/works"
+
+def crossref_headers(mailto: Optional[str]) -> Dict[str, str]:
+    return {"User-Agent": f"{USER_AGENT} mailto:{mailto}" if mailto else USER_AGENT}
+
+def crossref_params(year_min: int, year_max: int, rows: int) -> Dict[str, Any]:
     filters = f"from-pub-date:{year_min}-01-01,until-pub-date:{year_max}-12-31"
-    base_params = {"rows": rows, "filter": filters, "select": "title,author,issued,abstract,DOI,type,URL",
-                   "sort": "relevance", "order": "desc"}
-    query_field = "query.title" if title_search else "query"
-    def time_up(): return deadline_ts is not None and time.time() >= deadline_ts
-    for page in range(max_pages):
-        if STOP_REQUESTED or time_up(): break
-        params = dict(base_params)
-        params["offset"] = page * rows
-        params[query_field] = consulta
-        r = http_get("https://api.crossref.org/works", headers=headers, timeout=TIMEOUT,
-                     retries=2, backoff=1.3, debug=debug, params=params)
-        if not r: break
-        items = (r.json().get("message") or {}).get("items", [])
-        if not items: break
-        for it in items:
-            if STOP_REQUESTED or time_up(): break
-            titulo = " ".join(it.get("title") or []).strip()
-            ano = None
-            issued = it.get("issued", {}).get("date-parts")
-            if issued and isinstance(issued, list) and issued[0]:
-                y = issued[0][0]
-                if isinstance(y, int): ano = y
-            autores_list = []
-            for a in it.get("author", []) or []:
-                given = a.get("given") or ""
-                family = a.get("family") or ""
-                nm = (given + " " + family).strip()
-                if nm: autores_list.append(nm)
-            autores = "; ".join(autores_list)
-            resumo = clean_text(it.get("abstract"))
-            doi = (it.get("DOI") or "").lower()
-            link = it.get("URL") or ""
-            tipo = (it.get("type") or "").lower()
-            hit_ctx = {"fonte": "Crossref", "endpoint": "api.crossref.org/works",
-                       "query_field": query_field, "query": consulta, "offset": page * rows}
-            yield make_record(descritor_base, consulta, "Crossref", tipo, ano, titulo, autores, resumo, doi, link, hit_ctx)
-        sleep_with_jitter(delay)
+    return {"rows": rows, "filter": filters, "select": CROSSREF_SELECT,
+            "sort": "relevance", "order": "desc"}
+
+def crossref_record(it: Dict[str, Any], descritor_base: str, consulta: str,
+                    query_field: str, position: Dict[str, Any]) -> Record:
+    """Registro de um item da resposta; position é {"cursor": …} ou {"offset": …} (vai para o hit_context)."""
+    titulo = " ".join(it.get("title") or []).strip()
+    ano = None
+    issued = it.get("issued", {}).get("date-parts")
+    if issued and isinstance(issued, list) and issued[0]:
+        y = issued[0][0]
+        if isinstance(y, int): ano = y
+    autores_list = []
+    for a in it.get("author", []) or []:
+        given = a.get("given") or ""
+        family = a.get("family") or ""
+        nm = (given + " " + family).strip()
+        if nm: autores_list.append(nm)
+    autores = "; ".join(autores_list)
+    resumo = clean_text(it.get("abstract"))
+    doi = (it.get("DOI") or "").lower()
+    link = it.get("URL") or ""
+    tipo = (it.get("type") or "").lower()
+    hit_ctx = {"fonte": "Crossref", "endpoint": "api.crossref.org/works",
+               "query_field": query_field, "query": consulta, **position}
+    return make_record(descritor_base, consulta, "Crossref", tipo, ano, titulo, autores, resumo, doi, link, hit_ctx)
+
+def crossref_scored_record(it: Dict[str, Any], *args) -> Tuple[Record, Optional[float]]:
+    return crossref_record(it, *args), it.get("score")
+
+class CrossrefPages(PageStep):
+    fonte = "crossref"
+    backoff = 1.3
+    item_paths, meta_paths = ("message.items",), ("message.next-cursor",)
+
+    def __init__(self, descritor_base: str, consulta: str, year_min: int, year_max: int,
+                 rows: int, max_pages: int, mailto: Optional[str], title_search: bool,
+                 debug: bool = False, start_state: Optional[Dict[str, Any]] = None,
+                 fast: bool = False, pager: Optional[PageBudget] = None):
+        super().__init__(descritor_base, consulta, max_pages, pager, debug)
+        self.headers = crossref_headers(mailto)
+        self.params = crossref_params(year_min, year_max, rows)
+        self.rows = rows
+        self.query_field = "query.title" if title_search else "query"
+        self.page = int((start_state or {}).get("page") or 0)
+        # modo rápido: cursor=* (deep paging) no lugar de offset, que o Crossref degrada em páginas altas
+        self.cursor = ((start_state or {}).get("cursor") or "*") if fast else None
+
+    def position(self) -> Dict[str, Any]:
+        return {"cursor": self.cursor} if self.cursor else {"offset": self.page * self.rows}
+
+    def next_request(self):
+        if not pages_left(self.pager, self.page, self.max_pages): return None
+        params = dict(self.params)
+        params.update(self.position())
+        params[self.query_field] = self.consulta
+        return CROSSREF_API, params
+
+    def build(self):
+        return (crossref_scored_record, self.descritor, self.consulta, self.query_field, self.position())
+
+    def finish(self, page, n):
+        if page.error: return None
+        if not n:
+            return self.mark(None, True)
+        self.page += 1
+        if self.cursor:
+            self.cursor = page.meta.get("message.next-cursor")
+            self.done = not self.cursor or n < self.rows
+            return self.mark({"page": self.page, "cursor": self.cursor},
+                             self.done or last_page(self.pager, self.page, self.max_pages))
+        return self.mark({"page": self.page, "offset": self.page * self.rows},
+                         last_page(self.pager, self.page, self.max_pages))
+
+def crossref_search(descritor_base: str, consulta: str, year_min: int, year_max: int,
+                    rows: int, max_pages: int, mailto: Optional[str],
+                    title_search: bool, deadline_ts: Optional[float], debug: bool=False,
+                    start_state: Optional[Dict[str, Any]] = None, fast: bool = False,
+                    pager: Optional[PageBudget] = None) -> Iterable[Any]:
+    step = CrossrefPages(descritor_base, consulta, year_min, year_max, rows, max_pages, mailto, title_search,
+                         debug, start_state, fast, pager)
+    return iter_pages(step, deadline_check(deadline_ts))
 
 # ============ BDTD (API + HTML) ============
 BLOCKLIST_DOMAINS = {"brasil.gov.br", "www.brasil.gov.br"}
@@ -777,21 +3119,41 @@ def select_best_fulltext_link(soup: BeautifulSoup, record_url: str) -> Optional[
         return best_url
     return None
 
+ABSTRACT_META_NAMES = ("DC.description", "dc.description", "description", "citation_abstract")
+_ABSTRACT_META_RES = [re.compile(n, re.I) for n in ABSTRACT_META_NAMES]
+_HEADING_TAG_RE = re.compile(r"h[2-5]", re.I)
+_HDR_ORDER = ("pt", "es", "en", "desc")
+# fases, em ordem de precedência: meta, seletores CSS, th/dt, label/strong/b/span, h2–h5
+_PH_META, _PH_SEL, _PH_CELL, _PH_LABEL, _PH_HEAD = range(5)
+
+def _abstract_selector_keys(el: Tag) -> List[str]:
+    """Equivale a .resumo/#resumo/[id*=resumo i], .abstract/… e .descricao/… (nessa ordem)."""
+    cls = el.get("class") or []
+    if isinstance(cls, str): cls = cls.split()
+    ident = (el.get("id") or "").lower()
+    keys = []
+    if "resumo" in cls or "resumo" in ident: keys.append("pt")
+    if "abstract" in cls or "abstract" in ident: keys.append("en")
+    if "descripcion" in cls or "descricao" in cls or "descri" in ident: keys.append("desc")
+    return keys
+
 def extract_best_abstract(soup: BeautifulSoup) -> str:
+    """
+    Varre o documento uma única vez, em ordem, reunindo candidatos a resumo por idioma
+    (pt, es, en, desc). Vale o candidato da fase de maior precedência (meta, seletores,
+    th/dt, rótulos, cabeçalhos) e, dentro da fase, o primeiro no documento — o mesmo
+    resultado das antigas varreduras separadas. Corpos de rótulos/cabeçalhos só são
+    extraídos quando podem melhorar um candidato, e a varredura termina assim que um
+    resumo em português da fase de seletores (imbatível) aparece.
+    """
     def clean(s: str) -> str: return clean_text(s)
-    candidates = {"pt":"", "es":"", "en":"", "desc":""}
-    for meta_name in ("DC.description", "dc.description", "description", "citation_abstract"):
-        for m in soup.find_all("meta", attrs={"name": re.compile(meta_name, re.I)}):
-            val = clean(m.get("content", ""))
-            if val and not candidates["desc"]: candidates["desc"] = val
-    for sel, key in [(".resumo, #resumo, [id*=resumo i]", "pt"),
-                     (".abstract, #abstract, [id*=abstract i]", "en"),
-                     (".descripcion, .descricao, #descricao, [id*=descri i]", "desc")]:
-        for el in soup.select(sel):
-            txt = clean(el.get_text(" ", strip=True))
-            if txt and not NEG_LABEL.search(txt) and not candidates[key]:
-                candidates[key] = txt
-    def _text_after_cell_label(lbl: BeautifulSoup) -> str:
+    best: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+    def improves(key: str, rank: Tuple[int, int]) -> bool:
+        cur = best.get(key)
+        return cur is None or rank < cur[0]
+
+    def _text_after_cell_label(lbl: Tag) -> str:
         tr = lbl.find_parent("tr")
         if not tr: return ""
         td = tr.find("td")
@@ -802,16 +3164,7 @@ def extract_best_abstract(soup: BeautifulSoup) -> str:
             if got and c.name in ("td", "dd"):
                 return clean(c.get_text(" ", strip=True))
         return ""
-    for hdr in soup.find_all(["th", "dt"]):
-        label = clean(hdr.get_text(" ", strip=True))
-        if not label or NEG_LABEL.search(label): continue
-        for key, pat in HDR_PATTERNS.items():
-            if pat.search(label):
-                body = _text_after_cell_label(hdr)
-                if body and not NEG_LABEL.search(body) and not candidates[key]:
-                    candidates[key] = body
-                break
-    def _text_from_label_block(lbl: BeautifulSoup) -> str:
+    def _text_from_label_block(lbl: Tag) -> str:
         parent = lbl.parent
         chunks: List[str] = []
         for s in parent.find_next_siblings(limit=4):
@@ -831,18 +3184,11 @@ def extract_best_abstract(soup: BeautifulSoup) -> str:
                     if idx+1 < len(cols):
                         return clean(cols[idx+1].get_text(" ", strip=True))
         return ""
-    for lbl in soup.find_all(["label", "strong", "b", "span"]):
-        label = clean(lbl.get_text(" ", strip=True))
-        if not label or NEG_LABEL.search(label): continue
-        for key, pat in HDR_PATTERNS.items():
-            if pat.search(label):
-                body = _text_from_label_block(lbl)
-                if body and not NEG_LABEL.search(body) and not candidates[key]:
-                    candidates[key] = body
-                break
-    def _collect_following_paragraphs(start_el) -> str:
+    def _collect_following_paragraphs(start_el: Tag) -> str:
+        # next_elements é preguiçoso: para no próximo cabeçalho em vez de listar o resto do documento
         chunks: List[str] = []
-        for sib in start_el.find_all_next():
+        for sib in start_el.next_elements:
+            if not isinstance(sib, Tag): continue
             if sib == start_el: continue
             if sib.name and sib.name.lower() in ("h1","h2","h3","h4","h5"): break
             if sib.name in ("dt","th","label"): break
@@ -852,170 +3198,659 @@ def extract_best_abstract(soup: BeautifulSoup) -> str:
             if sum(len(x) for x in chunks) >= 6000: break
             if sib.get("class") and any(("tab" in c or "ficha" in c) for c in sib.get("class")): break
         return " ".join(chunks).strip()
-    for key, pat in HDR_PATTERNS.items():
-        for h in soup.find_all(re.compile(r"h[2-5]", re.I)):
-            tx = clean(h.get_text(" ", strip=True))
-            if pat.search(tx) and not NEG_LABEL.search(tx):
-                txt = _collect_following_paragraphs(h)
-                if txt and not NEG_LABEL.search(txt) and not candidates[key]:
-                    candidates[key] = txt
-    for key in ("pt","es","en","desc"):
-        if candidates.get(key): return candidates[key]
+
+    def labelled(el: Tag, phase: int, body_fn):
+        # th/dt e rótulos: a primeira chave cujo padrão casa decide (como antes)
+        if not any(improves(k, (phase, 0)) for k in _HDR_ORDER): return
+        label = clean(el.get_text(" ", strip=True))
+        if not label or NEG_LABEL.search(label): return
+        for key in _HDR_ORDER:
+            if HDR_PATTERNS[key].search(label):
+                if improves(key, (phase, 0)):
+                    body = body_fn(el)
+                    if body and not NEG_LABEL.search(body):
+                        best[key] = ((phase, 0), body)
+                break
+
+    for el in soup.descendants:
+        if not isinstance(el, Tag): continue
+        name = el.name
+        if name == "meta" and "name" in el.attrs:
+            mname = el.get("name")
+            if not isinstance(mname, str): mname = " ".join(mname)
+            for i, rx in enumerate(_ABSTRACT_META_RES):
+                if rx.search(mname):
+                    if improves("desc", (_PH_META, i)):
+                        val = clean(el.get("content", ""))
+                        if val: best["desc"] = ((_PH_META, i), val)
+                    break
+        if el.attrs:
+            for key in _abstract_selector_keys(el):
+                if improves(key, (_PH_SEL, 0)):
+                    txt = clean(el.get_text(" ", strip=True))
+                    if txt and not NEG_LABEL.search(txt):
+                        best[key] = ((_PH_SEL, 0), txt)
+            if "pt" in best and best["pt"][0][0] == _PH_SEL:
+                break
+        if name in ("th", "dt"):
+            labelled(el, _PH_CELL, _text_after_cell_label)
+        if name in ("label", "strong", "b", "span"):
+            labelled(el, _PH_LABEL, _text_from_label_block)
+        if _HEADING_TAG_RE.search(name) and any(improves(k, (_PH_HEAD, 0)) for k in _HDR_ORDER):
+            tx = clean(el.get_text(" ", strip=True))
+            if NEG_LABEL.search(tx): continue
+            body = None
+            for key in _HDR_ORDER:
+                if HDR_PATTERNS[key].search(tx) and improves(key, (_PH_HEAD, 0)):
+                    if body is None:
+                        body = _collect_following_paragraphs(el)
+                    if body and not NEG_LABEL.search(body):
+                        best[key] = ((_PH_HEAD, 0), body)
+    for key in _HDR_ORDER:
+        if key in best: return best[key][1]
     return ""
 
+BDTD_HEADERS_HTML = {"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"}
+BDTD_HEADERS_JSON = {"User-Agent": USER_AGENT, "Accept": "application/json"}
+BDTD_EXPORT_STYLES = ("Json", "JSON")
+
+def bdtd_enrich_empty() -> Dict[str, Any]:
+    return {"resumo": "", "autores": "", "ano": None, "doi": "", "link_pdf": "", "tipo": ""}
+
+def bdtd_export_fields(data: Optional[Dict[str, Any]], out: Dict[str, Any]):
+    """Campos do Export?style=Json do registro."""
+    if not data:
+        return
+    res = data.get("abstract") or data.get("description") or ""
+    au = data.get("authors") or data.get("creator") or data.get("author")
+    yr = pick_year_from(data.get("publishDate"), data.get("date"), data.get("issued"), data.get("year"))
+    doi = pick_doi_from(data.get("doi"), data.get("identifier"), data.get("id"))
+    if res: out["resumo"] = clean_text(res)
+    if au: out["autores"] = normalize_authors(au)
+    if yr: out["ano"] = yr
+    if doi: out["doi"] = doi
+
+def bdtd_page_fields(markup: str, record_url: str, out: Dict[str, Any]) -> Dict[str, Any]:
+    """Completa o que faltou a partir da página HTML do registro (devolve out, que pode vir de outro processo)."""
+    soup = make_soup(markup)
+    page = PageText(soup)
+    if not out["autores"]:
+        metas = soup.find_all("meta", attrs={"name": re.compile(r"dc\.creator", re.I)})
+        if metas:
+            out["autores"] = "; ".join([m.get("content","") for m in metas if m.get("content")])
+        if not out["autores"]:
+            for lbl in soup.find_all(["dt","th","label","strong","b"]):
+                if re.search(r"\b(autor|autores|author|creator)\b", lbl.get_text(" ", strip=True), re.I):
+                    dd = lbl.find_next(["dd","td","p","div","span"])
+                    if dd: out["autores"] = clean_text(dd.get_text(" ", strip=True)); break
+    if not out["resumo"]:
+        out["resumo"] = extract_best_abstract(soup)
+    if not out["ano"]:
+        m = soup.find("meta", attrs={"name": re.compile(r"(dc\.date|citation_publication_date)", re.I)})
+        if m and m.get("content"):
+            out["ano"] = pick_year_from(m.get("content"))
+        if not out["ano"]:
+            for lbl in soup.find_all(["dt","th","label","strong","b"]):
+                if re.search(r"(data|ano|issued|date)", lbl.get_text(" ", strip=True), re.I):
+                    dd = lbl.find_next(["dd","td","p","div","span"])
+                    if dd:
+                        out["ano"] = pick_year_from(dd.get_text(" ", strip=True))
+                        if out["ano"]: break
+    if not out["doi"]:
+        metas = soup.find_all("meta", attrs={"name": re.compile(r"dc\.identifier", re.I)})
+        for m in metas:
+            doi = pick_doi_from(m.get("content",""))
+            if doi: out["doi"] = doi; break
+        if not out["doi"]:
+            out["doi"] = pick_doi_from(page.text)
+    if not out["tipo"]:
+        txt = page.lower
+        if any(k in txt for k in ["tese","doctoral","phd","doutor"]):
+            out["tipo"] = "thesis"
+        elif any(k in txt for k in ["dissertação","dissertacao","mestrado","master"]):
+            out["tipo"] = "dissertation"
+        else:
+            out["tipo"] = "thesis/dissertation"
+    best = select_best_fulltext_link(soup, record_url)
+    if best: out["link_pdf"] = best
+    return out
+
+def bdtd_enrich_done(out: Dict[str, Any]) -> Dict[str, Any]:
+    if out["resumo"] and NEG_LABEL.search(out["resumo"]) and len(out["resumo"]) < 120:
+        out["resumo"] = ""
+    return out
+
+def _json_or_none(r: Optional[requests.Response]) -> Optional[Dict[str, Any]]:
+    if not r: return None
+    try:
+        return r.json()
+    except Exception:
+        return None
+
 def bdtd_enrich(record_url: str, timeout_sec: float, debug: bool=False) -> Dict[str, Any]:
     start = time.time()
-    headers_html = {"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"}
-    headers_json = {"User-Agent": USER_AGENT, "Accept": "application/json"}
-    out = {"resumo": "", "autores": "", "ano": None, "doi": "", "link_pdf": "", "tipo": ""}
-
+    out = bdtd_enrich_empty()
     if time.time() - start < timeout_sec * 0.6:
-        for style in ("Json", "JSON"):
+        for style in BDTD_EXPORT_STYLES:
             u = f"{record_url}/Export?style={style}"
-            r = http_get(u, headers=headers_json, timeout=TIMEOUT, retries=1, backoff=1.3, debug=debug)
-            if r:
-                try:
-                    data = r.json()
-                except Exception:
-                    data = None
-                if data:
-                    res = data.get("abstract") or data.get("description") or ""
-                    au = data.get("authors") or data.get("creator") or data.get("author")
-                    yr = pick_year_from(data.get("publishDate"), data.get("date"), data.get("issued"), data.get("year"))
-                    doi = pick_doi_from(data.get("doi"), data.get("identifier"), data.get("id"))
-                    if res: out["resumo"] = clean_text(res)
-                    if au: out["autores"] = normalize_authors(au)
-                    if yr: out["ano"] = yr
-                    if doi: out["doi"] = doi
+            r = http_get(u, headers=BDTD_HEADERS_JSON, timeout=TIMEOUT, retries=1, backoff=1.3, debug=debug)
+            bdtd_export_fields(_json_or_none(r), out)
+    if time.time() - start < timeout_sec:
+        r = http_get(record_url, headers=BDTD_HEADERS_HTML, timeout=TIMEOUT, retries=1, backoff=1.2, debug=debug)
+        if r:
+            out = parse_call(bdtd_page_fields, r.text, record_url, out)
+    return bdtd_enrich_done(out)
 
+async def bdtd_enrich_async(record_url: str, timeout_sec: float, debug: bool=False) -> Dict[str, Any]:
+    start = time.time()
+    out = bdtd_enrich_empty()
+    if time.time() - start < timeout_sec * 0.6:
+        # os dois estilos de Export saem juntos; aplicados na mesma ordem do caminho síncrono
+        rs = await asyncio.gather(*(http_get_async(f"{record_url}/Export?style={style}", headers=BDTD_HEADERS_JSON,
+                                                   timeout=TIMEOUT, retries=1, backoff=1.3, debug=debug)
+                                    for style in BDTD_EXPORT_STYLES))
+        for r in rs:
+            bdtd_export_fields(_json_or_none(r), out)
     if time.time() - start < timeout_sec:
-        r = http_get(record_url, headers=headers_html, timeout=TIMEOUT, retries=1, backoff=1.2, debug=debug)
+        r = await http_get_async(record_url, headers=BDTD_HEADERS_HTML, timeout=TIMEOUT, retries=1, backoff=1.2, debug=debug)
         if r:
-            soup = BeautifulSoup(r.text, "html.parser")
-            if not out["autores"]:
-                metas = soup.find_all("meta", attrs={"name": re.compile(r"dc\.creator", re.I)})
-                if metas:
-                    out["autores"] = "; ".join([m.get("content","") for m in metas if m.get("content")])
-                if not out["autores"]:
-                    for lbl in soup.find_all(["dt","th","label","strong","b"]):
-                        if re.search(r"\b(autor|autores|author|creator)\b", lbl.get_text(" ", strip=True), re.I):
-                            dd = lbl.find_next(["dd","td","p","div","span"])
-                            if dd: out["autores"] = clean_text(dd.get_text(" ", strip=True)); break
-            if not out["resumo"]:
-                out["resumo"] = extract_best_abstract(soup)
-            if not out["ano"]:
-                m = soup.find("meta", attrs={"name": re.compile(r"(dc\.date|citation_publication_date)", re.I)})
-                if m and m.get("content"):
-                    out["ano"] = pick_year_from(m.get("content"))
-                if not out["ano"]:
-                    for lbl in soup.find_all(["dt","th","label","strong","b"]):
-                        if re.search(r"(data|ano|issued|date)", lbl.get_text(" ", strip=True), re.I):
-                            dd = lbl.find_next(["dd","td","p","div","span"])
-                            if dd:
-                                out["ano"] = pick_year_from(dd.get_text(" ", strip=True))
-                                if out["ano"]: break
-            if not out["doi"]:
-                metas = soup.find_all("meta", attrs={"name": re.compile(r"dc\.identifier", re.I)})
-                for m in metas:
-                    doi = pick_doi_from(m.get("content",""))
-                    if doi: out["doi"] = doi; break
-                if not out["doi"]:
-                    out["doi"] = pick_doi_from(soup.get_text(" ", strip=True))
-            if not out["tipo"]:
-                txt = soup.get_text(" ", strip=True).lower()
-                if any(k in txt for k in ["tese","doctoral","phd","doutor"]):
-                    out["tipo"] = "thesis"
-                elif any(k in txt for k in ["dissertação","dissertacao","mestrado","master"]):
-                    out["tipo"] = "dissertation"
-                else:
-                    out["tipo"] = "thesis/dissertation"
-            best = select_best_fulltext_link(soup, record_url)
-            if best: out["link_pdf"] = best
-    if out["resumo"] and NEG_LABEL.search(out["resumo"]) and len(out["resumo"]) < 120:
-        out["resumo"] = ""
-    return out
+            out = await parse_call_async(bdtd_page_fields, r.text, record_url, out)
+    return bdtd_enrich_done(out)
+
+def bdtd_apply_enrichment(rec: Dict[str, Any], det: Dict[str, Any]):
+    if not rec["resumo"] and det.get("resumo"): rec["resumo"] = det["resumo"]
+    if not rec["autores"] and det.get("autores"): rec["autores"] = det["autores"]
+    if not rec["ano"] and det.get("ano"): rec["ano"] = int(det["ano"])
+    if not rec["doi"] and det.get("doi"): rec["doi"] = det["doi"].lower()
+    if det.get("link_pdf"): rec["link"] = det["link_pdf"]
+    if rec["tipo"] == "thesis/dissertation" and det.get("tipo"): rec["tipo"] = det["tipo"]
+
+def bdtd_query(consulta: str, year_min: int, year_max: int, exact_phrase: bool) -> Tuple[str, str]:
+    """(termo registrado como consulta, lookfor completo com o filtro de anos)."""
+    look = f"\"{consulta}\"" if exact_phrase else consulta
+    return look, f'{look} AND publishDate:[{year_min} TO {year_max}]'
+
+def bdtd_item_record(rec: Dict[str, Any], descritor_base: str, look: str, q: str,
+                     page: int) -> Tuple[Record, str]:
+    """Registro de um item da API e a URL do registro na BDTD (usada no enriquecimento)."""
+    rid = rec.get("id") or rec.get("recordId") or rec.get("id_str") or ""
+    record_link = f"{BDTD_HOST}/vufind/Record/{rid}" if rid else (rec.get("url") or "")
+    titulo = (rec.get("title") or rec.get("title_full") or rec.get("title_fullStr") or rec.get("title_short") or "").strip()
+    autores = normalize_authors(
+        rec.get("authors") or rec.get("author") or rec.get("author_facet") or
+        rec.get("dc.contributor.author") or rec.get("dc.contributor.author.fl_str_mv") or []
+    )
+    ano = pick_year_from(
+        rec.get("publishDate"), rec.get("year"), rec.get("publicationDates"),
+        rec.get("dc.date.issued"), rec.get("date"), rec.get("dc.date")
+    )
+    resumo = rec.get("summary") or rec.get("abstract") or rec.get("dc.description.abstract") or rec.get("description") or ""
+    if isinstance(resumo, list): resumo = " ".join([str(x) for x in resumo if x])
+    resumo = clean_text(resumo)
+    doi = pick_doi_from(
+        rec.get("doi"), rec.get("DOI"), rec.get("identifier"), rec.get("dc.identifier"),
+        rec.get("dc.identifier.doi"), rec.get("dc.identifier.uri"), rec.get("urls"), rec.get("url")
+    )
+    tipo = "thesis/dissertation"
+    formats = rec.get("formats") or rec.get("format") or rec.get("format_str_mv") or rec.get("dc.type") or []
+    fm = " ".join([str(x).lower() for x in formats]) if isinstance(formats, list) else str(formats).lower()
+    if any(k in fm for k in ["doctoral","doutor","tese","phd"]):
+        tipo = "thesis"
+    elif any(k in fm for k in ["master","mestrado","disser"]):
+        tipo = "dissertation"
+
+    link = record_link
+    api_url = rec.get("url")
+    if isinstance(api_url, list):
+        for u in api_url:
+            if u: link = u; break
+    elif isinstance(api_url, str) and api_url:
+        link = api_url
+
+    hit_ctx = {"fonte": "BDTD", "endpoint": "bdtd.ibict.br/vufind/api/v1/search",
+               "lookfor": q, "page": page}
+    return make_record(descritor_base, look, "BDTD", tipo, ano, titulo, autores, resumo, doi, link, hit_ctx), record_link
+
+def bdtd_needs_enrich(rec: Dict[str, Any], record_link: str, defer_doi: bool) -> bool:
+    if not record_link:
+        return False
+    if rec["doi"] and defer_doi:
+        return False  # completado depois pelo lote da OpenAlex
+    link = rec["link"]
+    return (not rec["resumo"] or not rec["autores"] or not rec["ano"] or not rec["doi"] or not link
+            or "Record/" in link or "bdtd.ibict.br" in link)
+
+class BdtdPages(PageStep):
+    fonte = "bdtd"
+    item_paths = ("records", "result.records", "items")
+
+    def __init__(self, descritor_base: str, consulta: str, year_min: int, year_max: int,
+                 limit_per_page: int, max_pages: int, enrich_max: int, enrich_timeout: float,
+                 exact_phrase: bool, debug: bool = False, start_state: Optional[Dict[str, Any]] = None,
+                 defer_doi: bool = False, pager: Optional[PageBudget] = None,
+                 deferred: Optional[Dict[str, Tuple[PageStep, str]]] = None):
+        super().__init__(descritor_base, consulta, max_pages, pager, debug)
+        self.headers = BDTD_HEADERS_JSON
+        self.look, self.q = bdtd_query(consulta, year_min, year_max, exact_phrase)
+        self.limit = limit_per_page
+        self.enrich_timeout = enrich_timeout
+        self.defer_doi = defer_doi
+        self.deferred = deferred
+        self.page = int((start_state or {}).get("page") or 1)
+        # orçamento de enriquecimento restante, retomado do estado como na SciELO
+        self.enrich_left = int((start_state or {}).get("enrich_left", enrich_max))
+
+    def next_request(self):
+        if not pages_left(self.pager, self.page - 1, self.max_pages): return None
+        return BDTD_API_BASE, {"lookfor": self.q, "type": "AllFields", "limit": self.limit, "page": self.page}
+
+    def build(self):
+        return (bdtd_item_record, self.descritor, self.look, self.q, self.page)
+
+    def accept(self, item):
+        rec, record_link = item
+        if bdtd_needs_enrich(rec, record_link, self.defer_doi):
+            if self.enrich_left > 0:
+                self.enrich_left -= 1
+                return rec, record_link
+        elif self.deferred is not None and self.enrich_left > 0 and self.still_needs(rec, record_link):
+            self.deferred[dedupe_key(rec)] = (self, record_link)  # idem SciELO
+        return rec, None
+
+    def still_needs(self, rec, url):
+        return bdtd_needs_enrich(rec, url, False)
+
+    def enrich(self, url):
+        return bdtd_enrich(url, timeout_sec=self.enrich_timeout, debug=self.debug)
+
+    async def aenrich(self, url):
+        return await bdtd_enrich_async(url, self.enrich_timeout, self.debug)
+
+    def apply(self, rec, res):
+        bdtd_apply_enrichment(rec, res)
+
+    def finish(self, page, n):
+        if page.error: return None
+        if not n:
+            return self.mark(None, True)
+        self.page += 1
+        return self.mark({"page": self.page, "enrich_left": self.enrich_left},
+                         last_page(self.pager, self.page - 1, self.max_pages))
 
 def bdtd_api_search(descritor_base: str, consulta: str, year_min: int, year_max: int,
                     limit_per_page: int, max_pages: int,
                     enrich_max: int, enrich_timeout: float,
-                    delay: float, exact_phrase: bool, deadline_ts: Optional[float], debug: bool=False) -> Iterable[Dict[str, Any]]:
-    headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
-    look = f"\"{consulta}\"" if exact_phrase else consulta
-    q = f'{look} AND publishDate:[{year_min} TO {year_max}]'
-    enriched = 0
-    def time_up(): return deadline_ts is not None and time.time() >= deadline_ts
-    for page in range(1, max_pages + 1):
-        if STOP_REQUESTED or time_up(): break
-        params = {"lookfor": q, "type": "AllFields", "limit": limit_per_page, "page": page}
-        r = http_get(BDTD_API_BASE, headers=headers, timeout=TIMEOUT, retries=2, backoff=1.4, debug=debug, params=params)
-        if not r: break
+                    exact_phrase: bool, deadline_ts: Optional[float], debug: bool=False,
+                    enricher: Optional[EnrichmentPool] = None,
+                    start_state: Optional[Dict[str, Any]] = None,
+                    defer_doi: bool = False, pager: Optional[PageBudget] = None,
+                    deferred: Optional[Dict[str, Tuple[PageStep, str]]] = None) -> Iterable[Any]:
+    step = BdtdPages(descritor_base, consulta, year_min, year_max, limit_per_page, max_pages, enrich_max,
+                     enrich_timeout, exact_phrase, debug, start_state, defer_doi, pager, deferred)
+    return iter_pages(step, deadline_check(deadline_ts), enricher)
+
+# ============ Fontes (interface comum) ============
+class SearchContext:
+    """Parâmetros da execução comuns a todas as fontes."""
+    __slots__ = ("year_min", "year_max", "deadline_ts", "debug", "enricher", "defer_doi",
+                 "enrich_per_host", "deferred", "_enrich_slots")
+
+    def __init__(self, year_min: int, year_max: int, deadline_ts: Optional[float] = None,
+                 debug: bool = False, enricher: Optional[EnrichmentPool] = None,
+                 defer_doi: bool = False, enrich_per_host: int = ENRICH_PER_HOST):
+        self.year_min = year_min
+        self.year_max = year_max
+        self.deadline_ts = deadline_ts
+        self.debug = debug
+        self.enricher = enricher
+        self.defer_doi = defer_doi
+        self.enrich_per_host = enrich_per_host
+        # registros que pularam a raspagem à espera do lote da OpenAlex: chave -> (PageStep, URL)
+        self.deferred: Dict[str, Tuple[PageStep, str]] = {}
+        self._enrich_slots: Dict[str, asyncio.Semaphore] = {}
+
+    def time_up(self) -> bool:
+        return STOP_REQUESTED or (self.deadline_ts is not None and time.time() >= self.deadline_ts)
+
+    def enrich_slot(self, url: str) -> asyncio.Semaphore:
+        host = (urlparse(url).netloc or "").lower()
+        sem = self._enrich_slots.get(host)
+        if sem is None:
+            sem = self._enrich_slots[host] = asyncio.Semaphore(max(1, self.enrich_per_host))
+        return sem
+
+class Source:
+    """
+    Adaptador de uma fonte. step() monta o PageStep da unidade com as opções próprias da
+    fonte (páginas, tamanho da página, frase exata…), que chegam em **options com os
+    nomes dos parâmetros do gerador síncrono (*_search). iter_search() percorre as
+    páginas no modo síncrono e search() no async (gerador assíncrono de Records e
+    PageMarks, no mesmo protocolo). Com pager, o número de páginas é decidido pelo
+    PageBudget da unidade (--adaptive-pages).
+    """
+    name = ""
+    label = ""
+    pages: type = PageStep
+
+    def __init__(self, ctx: SearchContext, **options):
+        self.ctx = ctx
+        self.options = options
+
+    def step(self, descr: str, consulta: str, start_state: Optional[Dict[str, Any]] = None,
+             pager: Optional[PageBudget] = None) -> PageStep:
+        c = self.ctx
+        return self.pages(descr, consulta, c.year_min, c.year_max, debug=c.debug, start_state=start_state,
+                          pager=pager, **self.options)
+
+    def iter_search(self, descr: str, consulta: str, start_state: Optional[Dict[str, Any]] = None,
+                    pager: Optional[PageBudget] = None) -> Iterable[Any]:
+        return iter_pages(self.step(descr, consulta, start_state, pager), self.ctx.time_up, self.ctx.enricher)
+
+    def search(self, descr: str, consulta: str, start_state: Optional[Dict[str, Any]] = None,
+               pager: Optional[PageBudget] = None) -> AsyncIterator[Any]:
+        return aiter_pages(self.step(descr, consulta, start_state, pager), self.ctx.time_up, self.enrich_page)
+
+    async def enrich_page(self, step: PageStep, todo: List[Tuple[Dict[str, Any], str]]):
+        """Enriquece os registros de uma página em paralelo, no máximo enrich_per_host por host."""
+        async def one(rec: Dict[str, Any], url: str):
+            async with self.ctx.enrich_slot(url):
+                if self.ctx.time_up(): return
+                try:
+                    step.apply(rec, await step.aenrich(url))
+                except Exception as e:
+                    if self.ctx.debug:
+                        print(f"  [ENRICH] {url}: {e}")
+        await asyncio.gather(*(one(rec, url) for rec, url in todo))
+
+SOURCES: Dict[str, type] = {}
+
+def register_source(cls: type) -> type:
+    """Registra a fonte pelo nome usado em --fontes."""
+    SOURCES[cls.name] = cls
+    return cls
+
+@register_source
+class ScieloSource(Source):
+    name, label, pages = "scielo", "SciELO", ScieloPages
+
+    def step(self, descr, consulta, start_state=None, pager=None):
+        c = self.ctx
+        return ScieloPages(descr, consulta, c.year_min, c.year_max, debug=c.debug, start_state=start_state,
+                           defer_doi=c.defer_doi, pager=pager, deferred=c.deferred if c.defer_doi else None,
+                           **self.options)
+
+@register_source
+class OpenAlexSource(Source):
+    name, label, pages = "openalex", "OpenAlex", OpenAlexPages
+
+@register_source
+class CrossrefSource(Source):
+    name, label, pages = "crossref", "Crossref", CrossrefPages
+
+@register_source
+class BdtdSource(Source):
+    name, label, pages = "bdtd", "BDTD", BdtdPages
+
+    def step(self, descr, consulta, start_state=None, pager=None):
+        c = self.ctx
+        return BdtdPages(descr, consulta, c.year_min, c.year_max, debug=c.debug, start_state=start_state,
+                         defer_doi=c.defer_doi, pager=pager, deferred=c.deferred if c.defer_doi else None,
+                         **self.options)
+
+# ============ Orquestração ============
+def scrape_deferred(records: Iterable[Dict[str, Any]], deferred: Dict[str, Tuple[PageStep, str]],
+                    time_up) -> Iterable[Record]:
+    """
+    Depois do lote da OpenAlex (--doi-backfill): raspa a página de origem dos registros
+    adiados que ele não completou (DOI desconhecido, lote falho ou sem tempo).
+    Os adiamentos ficam só em memória: numa retomada, valem os da execução atual.
+    """
+    if not deferred:
+        return
+    for rec in records:
+        if time_up(): break
+        hit = deferred.get(dedupe_key(rec))
+        if hit is None: continue
+        step, url = hit
         try:
-            data = r.json()
-        except Exception:
-            break
-        recs = None
-        for path in ("records", "result.records", "items"):
-            cur = data
-            for key in path.split("."):
-                if isinstance(cur, dict): cur = cur.get(key)
-            if isinstance(cur, list):
-                recs = cur; break
-        if not recs: break
+            part = step.rescrape(rec, url)
+        except Exception as e:
+            if step.debug: print(f"  [ENRICH] {url}: {e}")
+            continue
+        if part is not None:
+            yield part
+
+# fontes que ignoram acentos na busca (a variante sem acento é a mesma consulta)
+ACCENT_FOLDING_SOURCES = frozenset({"openalex"})
+LANE_QUEUE_SIZE = 1000  # registros em trânsito entre as lanes e o CheckpointManager
+
+def fast_paging(per_page: int, pages: int, cap: int) -> Tuple[int, int]:
+    """Reparte a mesma profundidade (per_page × pages) no menor número de páginas de até `cap` itens."""
+    depth = max(1, per_page) * max(1, pages)
+    pages = -(-depth // cap)
+    return -(-depth // pages), pages
+
+def build_consultas(descr: str, search_form: str, variant_map: Dict[str, List[str]]) -> List[str]:
+    if search_form == "controlada":
+        return [descr]
+    if search_form == "ampliada":
+        consultas = generate_variants(descr, variant_map, expand_variants=True)
+        if descr in consultas:
+            consultas.remove(descr); consultas.insert(0, descr)
+        return consultas
+    ctrl = [descr]
+    ampl = generate_variants(descr, variant_map, expand_variants=True)
+    if descr in ampl: ampl.remove(descr)
+    return ctrl + ampl
 
+def canonical_query(fonte: str, consulta: str) -> str:
+    """Forma como a fonte enxerga a consulta: espaços colapsados, caixa e (se for o caso) acentos ignorados."""
+    q = " ".join((consulta or "").split()).casefold()
+    if fonte in ACCENT_FOLDING_SOURCES:
+        q = strip_accents(q)
+    return q
+
+class QueryPlanner:
+    """
+    Executa cada consulta canônica (fonte, modo, consulta, intervalo de anos) uma única
+    vez por execução. Quando outro descritor/variante pede a mesma consulta, o conjunto
+    de resultados guardado é reaplicado com o novo descritor/consulta e a origem anotada
+    no hit_context, sem nova requisição. Só conjuntos completos (última página vista) são
+    guardados, e só enquanto alguma unidade do plano ainda vai pedi-los (expect/release).
+    """
+    def __init__(self, modes: Dict[str, Any], year_min: int, year_max: int):
+        self.modes = modes
+        self.years = (year_min, year_max)
+        self.results: Dict[Tuple[Any, ...], Tuple[str, List[Dict[str, Any]]]] = {}
+        self.pending: Dict[Tuple[Any, ...], int] = {}
+        self.inflight: Dict[Tuple[Any, ...], asyncio.Event] = {}
+        self.lock = threading.Lock()
+        self.reused = 0
+
+    def key(self, fonte: str, consulta: str) -> Tuple[Any, ...]:
+        return (fonte, self.modes.get(fonte), canonical_query(fonte, consulta)) + self.years
+
+    def expect(self, fonte: str, consulta: str):
+        """Registra uma unidade do plano que vai pedir esta consulta."""
+        key = self.key(fonte, consulta)
+        self.pending[key] = self.pending.get(key, 0) + 1
+
+    def release(self, fonte: str, consulta: str):
+        """Unidade atendida (ou pulada no resume); sem pedidos restantes, o conjunto sai da memória."""
+        self._release(self.key(fonte, consulta))
+
+    def _release(self, key: Tuple[Any, ...]):
+        with self.lock:
+            n = self.pending.get(key, 0) - 1
+            if n > 0:
+                self.pending[key] = n
+            else:
+                self.pending.pop(key, None)
+                self.results.pop(key, None)
+
+    def _wanted(self, key: Tuple[Any, ...]) -> bool:
+        """Outra unidade ainda vai pedir a consulta? Só então vale guardar o conjunto."""
+        with self.lock:
+            return self.pending.get(key, 0) > 1
+
+    def replay(self, cached: Tuple[str, List[Dict[str, Any]]], fonte: str, descr: str,
+               consulta: str) -> Iterable[Any]:
+        self.reused += 1
+        origem, recs = cached
         for rec in recs:
-            if STOP_REQUESTED or time_up(): break
-            rid = rec.get("id") or rec.get("recordId") or rec.get("id_str") or ""
-            record_link = f"{BDTD_HOST}/vufind/Record/{rid}" if rid else (rec.get("url") or "")
-            titulo = (rec.get("title") or rec.get("title_full") or rec.get("title_fullStr") or rec.get("title_short") or "").strip()
-            autores = normalize_authors(
-                rec.get("authors") or rec.get("author") or rec.get("author_facet") or
-                rec.get("dc.contributor.author") or rec.get("dc.contributor.author.fl_str_mv") or []
-            )
-            ano = pick_year_from(
-                rec.get("publishDate"), rec.get("year"), rec.get("publicationDates"),
-                rec.get("dc.date.issued"), rec.get("date"), rec.get("dc.date")
-            )
-            resumo = rec.get("summary") or rec.get("abstract") or rec.get("dc.description.abstract") or rec.get("description") or ""
-            if isinstance(resumo, list): resumo = " ".join([str(x) for x in resumo if x])
-            resumo = clean_text(resumo)
-            doi = pick_doi_from(
-                rec.get("doi"), rec.get("DOI"), rec.get("identifier"), rec.get("dc.identifier"),
-                rec.get("dc.identifier.doi"), rec.get("dc.identifier.uri"), rec.get("urls"), rec.get("url")
-            )
-            tipo = "thesis/dissertation"
-            formats = rec.get("formats") or rec.get("format") or rec.get("format_str_mv") or rec.get("dc.type") or []
-            fm = " ".join([str(x).lower() for x in formats]) if isinstance(formats, list) else str(formats).lower()
-            if any(k in fm for k in ["doctoral","doutor","tese","phd"]):
-                tipo = "thesis"
-            elif any(k in fm for k in ["master","mestrado","disser"]):
-                tipo = "dissertation"
-
-            link = record_link
-            api_url = rec.get("url")
-            if isinstance(api_url, list):
-                for u in api_url:
-                    if u: link = u; break
-            elif isinstance(api_url, str) and api_url:
-                link = api_url
-
-            hit_ctx = {"fonte": "BDTD", "endpoint": "bdtd.ibict.br/vufind/api/v1/search",
-                       "lookfor": q, "page": page}
-
-            need = (not resumo or not autores or not ano or not doi or not link or "Record/" in link or "bdtd.ibict.br" in link)
-            if need and enriched < enrich_max and record_link and not time_up():
-                det = bdtd_enrich(record_link, timeout_sec=enrich_timeout, debug=debug)
-                enriched += 1
-                if not resumo and det.get("resumo"): resumo = det["resumo"]
-                if not autores and det.get("autores"): autores = det["autores"]
-                if not ano and det.get("ano"): ano = det["ano"]
-                if not doi and det.get("doi"): doi = det["doi"]
-                if det.get("link_pdf"): link = det["link_pdf"]
-                if tipo == "thesis/dissertation" and det.get("tipo"): tipo = det["tipo"]
-
-            yield make_record(descritor_base, look, "BDTD", tipo, ano, titulo, autores, resumo, doi, link, hit_ctx)
-        sleep_with_jitter(delay)
+            out = as_record(rec)
+            out["descritor"] = descr
+            # a consulta registrada pode vir na forma da fonte (ex.: entre aspas na frase exata)
+            c = rec.get("consulta")
+            out["consulta"] = c.replace(origem, consulta) if isinstance(c, str) and origem in c else consulta
+            out["hit_context"] = [dict(unpack_hit(h), descritor=descr, requested_query=consulta, reused=True)
+                                  for h in (rec.get("hit_context") or [])]
+            yield out
+        yield PageMark(fonte, descr, consulta, None, True)
+
+    def run(self, fonte: str, descr: str, consulta: str, fetch) -> Iterable[Any]:
+        key = self.key(fonte, consulta)
+        try:
+            with self.lock:
+                cached = self.results.get(key)
+            if cached is not None:
+                yield from self.replay(cached, fonte, descr, consulta)
+                return
+            keep = self._wanted(key)
+            collected: List[Dict[str, Any]] = []
+            complete = False
+            for item in fetch():
+                if isinstance(item, PageMark):
+                    complete = complete or item.done
+                elif keep:
+                    collected.append(item)
+                yield item
+            if complete and keep:
+                with self.lock:
+                    self.results.setdefault(key, (consulta, collected))
+        finally:
+            self._release(key)
+
+    async def arun(self, fonte: str, descr: str, consulta: str, fetch) -> AsyncIterator[Any]:
+        """Como run(), no modo --async; se a mesma consulta já está em andamento, espera por ela."""
+        key = self.key(fonte, consulta)
+        try:
+            while key in self.inflight:
+                await self.inflight[key].wait()
+            cached = self.results.get(key)
+            if cached is not None:
+                for item in self.replay(cached, fonte, descr, consulta):
+                    yield item
+                return
+            keep = self._wanted(key)
+            done = self.inflight[key] = asyncio.Event()
+            collected: List[Dict[str, Any]] = []
+            complete = False
+            try:
+                async for item in fetch():
+                    if isinstance(item, PageMark):
+                        complete = complete or item.done
+                    elif keep:
+                        collected.append(item)
+                    yield item
+            finally:
+                if complete and keep:
+                    self.results.setdefault(key, (consulta, collected))
+                del self.inflight[key]
+                done.set()
+        finally:
+            self._release(key)
+
+class _LaneDone:
+    def __init__(self, fonte: str):
+        self.fonte = fonte
+
+def run_lanes(plan: List[Tuple[str, List[str]]], fontes: List[str], source_iter,
+              on_record, time_up, queue_size: int = LANE_QUEUE_SIZE):
+    """
+    Executa uma lane (thread) por fonte, em paralelo. Cada lane percorre todo o plano
+    descritor × variante da sua fonte, com o próprio ritmo de requisições, e envia os
+    registros para uma fila única; somente a thread principal chama on_record
+    (ex.: CheckpointManager.add), então o checkpoint não precisa de trava.
+    """
+    q: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+
+    def lane(fonte: str):
+        try:
+            for descr, consultas in plan:
+                for cq in consultas:
+                    if time_up(): return
+                    print(f"   • [{fonte}] {descr} → {cq}")
+                    for rec in source_iter(fonte, descr, cq):
+                        q.put(rec)
+                        if time_up(): return
+        except Exception as e:
+            print(f"[ERRO] lane {fonte}: {e}")
+        finally:
+            q.put(_LaneDone(fonte))
+
+    threads = [threading.Thread(target=lane, args=(f,), name=f"lane-{f}", daemon=True) for f in fontes]
+    for t in threads: t.start()
+    active = len(threads)
+    while active:
+        try:
+            item = q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if isinstance(item, _LaneDone):
+            active -= 1
+            print(f"   [lane {item.fonte}] concluída")
+            continue
+        on_record(item)
+    for t in threads: t.join()
+
+async def _drive_units(units: List[Tuple[str, str, str]], source_aiter, on_record, time_up, concurrency: int):
+    slots = asyncio.Semaphore(max(1, concurrency))
+    loop = asyncio.get_running_loop()
+    # on_record (store, NDJSON, checkpoint com fsync) numa thread só, fora do loop
+    writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+
+    def apply(batch: List[Any]):
+        for rec in batch:
+            on_record(rec)
+
+    async def unit(fonte: str, descr: str, cq: str):
+        async with slots:
+            if time_up(): return
+            print(f"   • [{fonte}] {descr} → {cq}")
+            batch: List[Any] = []
+            try:
+                async for rec in source_aiter(fonte, descr, cq):
+                    batch.append(rec)
+                    if isinstance(rec, PageMark):
+                        # a unidade só pede a próxima página depois de gravar esta
+                        pending, batch = batch, []
+                        await loop.run_in_executor(writer, apply, pending)
+                    if time_up(): break
+                if batch:
+                    await loop.run_in_executor(writer, apply, batch)
+            except Exception as e:
+                print(f"[ERRO] {fonte} {descr} → {cq}: {e}")
+
+    try:
+        await asyncio.gather(*(unit(*u) for u in units))
+    finally:
+        writer.shutdown(wait=True)
+        await close_async_client()
+
+def run_async(plan: List[Tuple[str, List[str]]], fontes: List[str], source_aiter,
+              on_record, time_up, concurrency: int = ASYNC_CONCURRENCY):
+    """
+    Executa todas as unidades descritor × variante × fonte num único event loop, até
+    `concurrency` ao mesmo tempo; o ritmo de cada host continua com o RATE_LIMITER.
+    on_record roda, página a página, numa única thread de escrita, para que o disco
+    (NDJSON, checkpoint do store) não pare o loop; as chamadas seguem em ordem e, como
+    em run_lanes, o checkpoint não precisa de trava.
+    """
+    # fontes intercaladas: as primeiras vagas não ficam todas no mesmo host
+    units = [(f, descr, cq) for descr, consultas in plan for cq in consultas for f in fontes]
+    asyncio.run(_drive_units(units, source_aiter, on_record, time_up, concurrency))
 
-# ============ Orquestração ============
 def run(descritores: List[str], fontes: List[str], year_min: int, year_max: int,
         delay: float, mailto: Optional[str],
         scielo_pages: int, scielo_enrich_max: int, scielo_enrich_timeout: float, scielo_exact: bool,
@@ -1029,12 +3864,22 @@ def run(descritores: List[str], fontes: List[str], year_min: int, year_max: int,
         # Novos
         out_json: str, out_ndjson: Optional[str],
         checkpoint_seconds: int, checkpoint_records: int,
-        resume: bool, max_seconds: Optional[int]) -> List[Dict[str, Any]]:
+        resume: bool, max_seconds: Optional[int],
+        parallel: bool = False, async_mode: bool = False, async_concurrency: int = ASYNC_CONCURRENCY,
+        parse_workers: int = PARSE_WORKERS, parse_queue: int = PARSE_QUEUE_SIZE,
+        store: str = "json", store_db: Optional[str] = None,
+        fuzzy: bool = False,
+        enrich_workers: int = ENRICH_WORKERS, enrich_per_host: int = ENRICH_PER_HOST,
+        doi_backfill: bool = False, fast_fetch: bool = False,
+        hits_sidecar: Optional[str] = None,
+        json_compact: bool = False, ndjson_compression: Optional[str] = None,
+        table_out: Optional[str] = None, viewer_index: Optional[str] = None,
+        adaptive_pages: bool = False, novelty_min: float = ADAPTIVE_NOVELTY_MIN,
+        relevance_floor: float = ADAPTIVE_RELEVANCE_FLOOR) -> List[Dict[str, Any]]:
 
     start_ts = time.time()
     deadline_ts = (start_ts + max_seconds) if max_seconds and max_seconds > 0 else None
 
-    all_records: List[Dict[str, Any]] = []
     fontes = [f.lower() for f in fontes]
 
     # variant map (tesauro + arquivo externo + default)
@@ -1046,92 +3891,178 @@ def run(descritores: List[str], fontes: List[str], year_min: int, year_max: int,
     eff_openalex_title = openalex_title_search or (search_form in ("controlada", "both"))
     eff_crossref_title = crossref_title_search or (search_form in ("controlada", "both"))
 
+    # modo rápido: mesma profundidade (páginas × itens) em menos requisições, maiores
+    if fast_fetch:
+        openalex_per_page, openalex_pages = fast_paging(openalex_per_page, openalex_pages, OPENALEX_MAX_PER_PAGE)
+        crossref_rows, crossref_pages = fast_paging(crossref_rows, crossref_pages, CROSSREF_MAX_ROWS)
+
+    # ritmo dos hosts sem limite próprio (APIs com limite publicado usam RATE_LIMITS_DEFAULT / --rate)
+    if delay and delay > 0:
+        RATE_LIMITER.default_rate = 1.0 / delay
+
     # checkpoint manager
-    ckpt = CheckpointManager(out_json, out_ndjson, checkpoint_seconds, checkpoint_records, resume)
+    ckpt = CheckpointManager(out_json, out_ndjson, checkpoint_seconds, checkpoint_records, resume,
+                             store=open_record_store(store, out_json, store_db, compact=json_compact), fuzzy=fuzzy,
+                             hits_sidecar=hits_sidecar, ndjson_compression=ndjson_compression)
 
-    for descr in descritores:
-        if STOP_REQUESTED or (deadline_ts and time.time() >= deadline_ts):
-            break
-        print(f"\n[BUSCA] Descritor base: {descr}")
-
-        # consultas conforme forma
-        if search_form == "controlada":
-            consultas = [descr]
-        elif search_form == "ampliada":
-            consultas = generate_variants(descr, variant_map, expand_variants=True)
-            if descr in consultas:
-                consultas.remove(descr); consultas.insert(0, descr)
-        else:
-            ctrl = [descr]
-            ampl = generate_variants(descr, variant_map, expand_variants=True)
-            if descr in ampl: ampl.remove(descr)
-            consultas = ctrl + ampl
+    # ledger de páginas concluídas (retomada por descritor × variante × fonte × página)
+    signature = {
+        "anos": [year_min, year_max], "search_form": search_form,
+        "scielo": [scielo_pages, eff_scielo_exact], "openalex": [openalex_pages, openalex_per_page, eff_openalex_title],
+        "crossref": [crossref_pages, crossref_rows, eff_crossref_title], "bdtd": [bdtd_pages, bdtd_limit_per_page, eff_bdtd_exact],
+        "fast_fetch": fast_fetch,
+    }
+    if adaptive_pages:
+        signature["adaptive"] = [novelty_min, relevance_floor]
+    ledger = WorkLedger(out_json + ".ledger.jsonl", signature, resume)
 
+    # paginação adaptativa: para pela taxa de novidade/relevância e remaneja as páginas que sobram
+    pager = AdaptivePager(ckpt.seen, novelty_min, relevance_floor) if adaptive_pages else None
+    if fast_fetch and pager is not None and relevance_floor > 0 and "openalex" in fontes:
+        print("[INFO] OpenAlex sem select= (--fast-fetch): o corte por relevância precisa do relevance_score")
+
+    # enriquecimento (SciELO/BDTD) em pool próprio, sem bloquear a paginação (no modo async, no próprio loop)
+    enricher = (EnrichmentPool(enrich_workers, enrich_per_host)
+                if enrich_workers and enrich_workers > 0 and not async_mode else None)
+
+    # parsing (HTML/JSON → Record) em processos, fora das threads de rede
+    if configure_parse_pool(parse_workers, parse_queue) is not None:
+        print(f"[INFO] Pool de parsing: {parse_workers} processos, até {parse_queue} corpos em espera")
+
+    def time_up() -> bool:
+        return STOP_REQUESTED or (deadline_ts is not None and time.time() >= deadline_ts)
+
+    planner = QueryPlanner({"scielo": eff_scielo_exact, "openalex": eff_openalex_title,
+                            "crossref": eff_crossref_title, "bdtd": eff_bdtd_exact}, year_min, year_max)
+
+    ctx = SearchContext(year_min, year_max, deadline_ts, debug, enricher,
+                        defer_doi=doi_backfill, enrich_per_host=enrich_per_host)
+    options = {
+        "scielo": dict(max_pages=scielo_pages, enrich_max=scielo_enrich_max, enrich_timeout=scielo_enrich_timeout,
+                       exact_phrase=eff_scielo_exact),
+        "openalex": dict(per_page=openalex_per_page, max_pages=openalex_pages, title_search=eff_openalex_title,
+                         fast=fast_fetch),
+        "crossref": dict(rows=crossref_rows, max_pages=crossref_pages, mailto=mailto,
+                         title_search=eff_crossref_title, fast=fast_fetch),
+        "bdtd": dict(limit_per_page=bdtd_limit_per_page, max_pages=bdtd_pages, enrich_max=bdtd_enrich_max,
+                     enrich_timeout=bdtd_enrich_timeout, exact_phrase=eff_bdtd_exact),
+    }
+    sources = {f: SOURCES[f](ctx, **options.get(f, {})) for f in SOURCES if f in fontes}
+
+    def resume_state(fonte: str, descr: str, q: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """(já concluída?, estado para continuar) da unidade no ledger."""
+        unit = ledger.get(descr, q, fonte)
+        if unit and unit["done"]:
+            ledger.skipped += 1
+            return True, None
+        return False, (unit["next"] if unit else None)
+
+    def source_iter(fonte: str, descr: str, q: str) -> Iterable[Any]:
+        done, start_state = resume_state(fonte, descr, q)
+        if done or start_state is not None:
+            planner.release(fonte, q)
+        if done:
+            return iter(())
+        src = sources[fonte]
+
+        def fetch() -> Iterable[Any]:
+            if pager is None:
+                return src.iter_search(descr, q, start_state)
+            budget = pager.unit(fonte, descr, q, src.options["max_pages"])
+            return budget.watch(src.iter_search(descr, q, start_state, budget))
+
+        return planner.run(fonte, descr, q, fetch) if start_state is None else fetch()
+
+    async def source_aiter(fonte: str, descr: str, q: str) -> AsyncIterator[Any]:
+        done, start_state = resume_state(fonte, descr, q)
+        if done or start_state is not None:
+            planner.release(fonte, q)
+        if done:
+            return
+        src = sources[fonte]
+
+        def fetch() -> AsyncIterator[Any]:
+            if pager is None:
+                return src.search(descr, q, start_state)
+            budget = pager.unit(fonte, descr, q, src.options["max_pages"])
+            return budget.awatch(src.search(descr, q, start_state, budget))
+
+        items = planner.arun(fonte, descr, q, fetch) if start_state is None else fetch()
+        async for item in items:
+            yield item
+
+    def on_record(rec: Any):
+        if isinstance(rec, PageMark):
+            # registros da página precisam estar no store antes de a página constar como feita
+            ckpt.flush_snapshot(log=False, full=False)
+            ledger.mark(rec)
+            return
+        ckpt.add(rec)
+
+    ativas = list(sources)
+    plan = [(descr, build_consultas(descr, search_form, variant_map)) for descr in descritores]
+    for _, consultas in plan:
         for q in consultas:
-            if STOP_REQUESTED or (deadline_ts and time.time() >= deadline_ts):
+            for fonte in ativas:
+                planner.expect(fonte, q)
+
+    if async_mode:
+        via = "httpx" if _HAS_HTTPX and HTTP_CACHE is None else "threads auxiliares"
+        print(f"\n[BUSCA] Modo async ({via}): até {async_concurrency} consultas simultâneas ({', '.join(ativas)})")
+        run_async(plan, ativas, source_aiter, on_record, time_up, async_concurrency)
+    elif parallel:
+        print(f"\n[BUSCA] Modo paralelo: {len(ativas)} lanes ({', '.join(ativas)})")
+        run_lanes(plan, ativas, source_iter, on_record, time_up)
+    else:
+        for descr, consultas in plan:
+            if time_up():
                 break
-            print(f"   • Variante: {q}")
-
-            if "scielo" in fontes:
-                print("     - SciELO …")
-                for rec in scielo_search(
-                    descritor_base=descr, consulta=q,
-                    year_min=year_min, year_max=year_max,
-                    max_pages=scielo_pages, enrich_max=scielo_enrich_max, enrich_timeout=scielo_enrich_timeout,
-                    delay=delay, exact_phrase=eff_scielo_exact, deadline_ts=deadline_ts, debug=debug
-                ):
-                    all_records.append(rec)
-                    ckpt.add(rec)
-                    if STOP_REQUESTED or (deadline_ts and time.time() >= deadline_ts): break
-
-            # OpenAlex (habilitada conforme fontes)
-            if "openalex" in fontes and not (STOP_REQUESTED or (deadline_ts and time.time() >= deadline_ts)):
-                for rec in openalex_search(
-                    descritor_base=descr, consulta=q,
-                    year_min=year_min, year_max=year_max,
-                    per_page=openalex_per_page, max_pages=openalex_pages,
-                    delay=delay, title_search=eff_openalex_title, deadline_ts=deadline_ts, debug=debug
-                ):
-                    all_records.append(rec)
-                    ckpt.add(rec)
-                    if STOP_REQUESTED or (deadline_ts and time.time() >= deadline_ts): break
-
-            if "crossref" in fontes and not (STOP_REQUESTED or (deadline_ts and time.time() >= deadline_ts)):
-                print("     - Crossref …")
-                for rec in crossref_search(
-                    descritor_base=descr, consulta=q,
-                    year_min=year_min, year_max=year_max,
-                    rows=crossref_rows, max_pages=crossref_pages,
-                    delay=delay, mailto=mailto, title_search=eff_crossref_title, deadline_ts=deadline_ts, debug=debug
-                ):
-                    all_records.append(rec)
-                    ckpt.add(rec)
-                    if STOP_REQUESTED or (deadline_ts and time.time() >= deadline_ts): break
-
-            if "bdtd" in fontes and not (STOP_REQUESTED or (deadline_ts and time.time() >= deadline_ts)):
-                print("     - BDTD …")
-                for rec in bdtd_api_search(
-                    descritor_base=descr, consulta=q,
-                    year_min=year_min, year_max=year_max,
-                    limit_per_page=bdtd_limit_per_page, max_pages=bdtd_pages,
-                    enrich_max=bdtd_enrich_max, enrich_timeout=bdtd_enrich_timeout,
-                    delay=delay, exact_phrase=eff_bdtd_exact, deadline_ts=deadline_ts, debug=debug
-                ):
-                    all_records.append(rec)
-                    ckpt.add(rec)
-                    if STOP_REQUESTED or (deadline_ts and time.time() >= deadline_ts): break
+            print(f"\n[BUSCA] Descritor base: {descr}")
+
+            for q in consultas:
+                if time_up():
+                    break
+                print(f"   • Variante: {q}")
+                for fonte in ativas:
+                    if time_up(): break
+                    print(f"     - {sources[fonte].label} …")
+                    for rec in source_iter(fonte, descr, q):
+                        on_record(rec)
+                        if time_up(): break
 
     # flush final
-    ckpt.finalize()
-    final = []
-    try:
-        final = json.load(open(out_json, "r", encoding="utf-8"))
-    except Exception:
-        final = dedupe(all_records)
-        tmp = out_json + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(final, f, ensure_ascii=False, indent=2)
-        os.replace(tmp, out_json)
+    if enricher is not None:
+        enricher.shutdown()
+    close_parse_pool()
+    if doi_backfill and not STOP_REQUESTED:
+        # complemento em lote: uma requisição à OpenAlex para até OPENALEX_BATCH_SIZE DOIs.
+        # Roda mesmo quando a busca acabou pelo --max-seconds, com janela própria: os
+        # registros adiados dependem dele para ter resumo/autores.
+        backfill_ts = time.time() + DOI_BACKFILL_SECONDS
+        backfill_up = deadline_check(backfill_ts)
+        filled = 0
+        for rec in openalex_backfill(ckpt.records(), time_up=backfill_up, debug=debug):
+            ckpt.store.upsert(rec)
+            filled += 1
+        print(f"[backfill] OpenAlex: {filled} registros com DOI complementados")
+        scraped = 0
+        for rec in scrape_deferred(ckpt.records(), ctx.deferred, backfill_up):
+            ckpt.store.upsert(rec)
+            scraped += 1
+        if scraped:
+            print(f"[backfill] {scraped} registros fora da OpenAlex raspados na página de origem")
+    final = ckpt.finalize()
+    ledger.close()
+    if ledger.skipped:
+        print(f"[resume] {ledger.skipped} unidades já concluídas foram puladas")
+    if planner.reused:
+        print(f"[INFO] {planner.reused} consultas repetidas atendidas sem nova requisição")
+    if pager is not None:
+        print(f"[adaptive] {pager.summary()}")
+    close_sessions()
+    if HTTP_CACHE is not None:
+        print(f"[INFO] Cache HTTP: {HTTP_CACHE.hits} hits, {HTTP_CACHE.misses} misses, "
+              f"{HTTP_CACHE.revalidated} revalidadas (304)")
 
     elapsed = int(time.time() - start_ts)
     print(f"\n[INFO] Tempo decorrido: {elapsed}s")
@@ -1142,6 +4073,12 @@ def run(descritores: List[str], fontes: List[str], year_min: int, year_max: int,
     print(f"[OK] JSON: {out_json} (registros: {len(final)})")
     if out_ndjson:
         print(f"[OK] NDJSON streaming: {out_ndjson}")
+    if table_out:
+        n = export_table(table_out, final)
+        print(f"[OK] Tabela colunar: {table_out} (registros: {n})")
+    if viewer_index:
+        n = export_viewer_index(viewer_index, final)
+        print(f"[OK] Índice do visualizador: {viewer_index}/manifest.json (registros: {n})")
     return final
 
 # ============ CLI ============
@@ -1153,16 +4090,55 @@ def parse_args():
                     help="Intervalo AAAA:AAAA (ex.: 1970:2025)")
     ap.add_argument("--descritores", default=None,
                     help="Arquivo de descritores (um por linha). Se ausente, usa a união embutida.")
-    ap.add_argument("--delay", type=float, default=REQUEST_DELAY, help="Delay (s) entre requisições")
+    ap.add_argument("--delay", type=float, default=REQUEST_DELAY,
+                    help="Intervalo (s) entre requisições para hosts sem limite próprio (ver --rate)")
+    ap.add_argument("--rate", nargs="+", default=None,
+                    help="Limite por host ou fonte: fonte=req_por_s[:rajada] (ex.: openalex=10:10 scielo=0.5)")
     ap.add_argument("--mailto", default=None, help="Seu e-mail (boa prática para Crossref)")
+    ap.add_argument("--pool-connections", type=int, default=HTTP_POOL_CONNECTIONS,
+                    help="Pools de conexão por sessão (uma sessão keep-alive por host)")
+    ap.add_argument("--pool-size", type=int, default=HTTP_POOL_MAXSIZE,
+                    help="Conexões mantidas abertas por host")
+
+    # Cache HTTP
+    ap.add_argument("--cache-db", default=None, help="Arquivo SQLite do cache de respostas HTTP (ausente = sem cache)")
+    ap.add_argument("--cache-ttl", nargs="+", default=None,
+                    help="TTL em segundos: N (padrão) ou fonte=N / host=N (ex.: openalex=86400 bdtd=604800)")
+    ap.add_argument("--cache-only", action="store_true",
+                    help="Modo offline: responde somente a partir do cache (requer --cache-db)")
     ap.add_argument("--debug", action="store_true", help="Logs detalhados")
+    ap.add_argument("--parallel", action="store_true",
+                    help="Executa uma lane por fonte em paralelo (SciELO, OpenAlex, Crossref e BDTD simultâneas)")
+    ap.add_argument("--async", dest="async_mode", action="store_true",
+                    help="Todas as consultas num único event loop (httpx, se instalado); substitui --parallel")
+    ap.add_argument("--async-concurrency", type=int, default=ASYNC_CONCURRENCY,
+                    help="Consultas (descritor × variante × fonte) simultâneas no modo --async")
 
     # Saídas & checkpoint
     ap.add_argument("--out", default=OUTPUT_JSON, help="Arquivo de saída JSON (snapshot deduplicado)")
     ap.add_argument("--out-ndjson", default=OUTPUT_NDJSON, help="Arquivo NDJSON (streaming de registros brutos)")
+    ap.add_argument("--json-compact", action="store_true",
+                    help="JSON final sem indentação (um registro por linha)")
+    ap.add_argument("--ndjson-compression", choices=["gzip", "zstd"], default=None,
+                    help="Comprime o NDJSON (padrão: pela extensão de --out-ndjson, .gz ou .zst)")
+    ap.add_argument("--parquet", default=None,
+                    help="Exporta o conjunto final em Parquet (ou Arrow IPC se terminar em .arrow/.feather); requer pyarrow")
+    ap.add_argument("--viewer-index", nargs="?", const=VIEWER_INDEX_DIR, default=None,
+                    help=f"Exporta índice + blocos de registros para o result.html (padrão: {VIEWER_INDEX_DIR}/)")
     ap.add_argument("--checkpoint-seconds", type=int, default=60, help="Intervalo em segundos entre snapshots")
     ap.add_argument("--checkpoint-records", type=int, default=50, help="Grava snapshot a cada N registros novos")
     ap.add_argument("--resume", action="store_true", help="Lê arquivos existentes e evita duplicar registros")
+    ap.add_argument("--store", choices=["json", "sqlite"], default="json",
+                    help="Backend dos registros: índice em memória + diário (json) ou banco SQLite (sqlite)")
+    ap.add_argument("--store-db", default=None, help="Arquivo SQLite do backend sqlite (padrão: <out>.sqlite)")
+    ap.add_argument("--hit-context", choices=["full", "counter"], default="full",
+                    help="hit_context no snapshot: uma entrada por ocorrência (full) ou contadores por (fonte, consulta)")
+    ap.add_argument("--hit-context-cap", type=int, default=0,
+                    help="Máximo de entradas de hit_context por registro (0 = sem limite)")
+    ap.add_argument("--hit-context-sidecar", default=None,
+                    help="Arquivo NDJSON com a proveniência completa (uma linha por ocorrência)")
+    ap.add_argument("--fuzzy-dedupe", action="store_true",
+                    help="Funde quase-duplicatas sem DOI (título/autores/ano ±1) no JSON final")
 
     # Temporizador
     ap.add_argument("--max-seconds", type=int, default=0, help="Tempo máximo de execução (0 = sem limite)")
@@ -1191,6 +4167,17 @@ def parse_args():
     ap.add_argument("--crossref-pages", type=int, default=CROSSREF_MAX_PAGES)
     ap.add_argument("--crossref-rows", type=int, default=CROSSREF_ROWS)
     ap.add_argument("--crossref-title-search", action="store_true", help="(Compat.) Usa query.title no Crossref")
+    ap.add_argument("--adaptive-pages", action="store_true",
+                    help="Trata --*-pages como orçamento: para a consulta quando a página traz poucas obras "
+                         "inéditas ou o score de relevância despenca, e passa as páginas que sobram às que ainda rendem")
+    ap.add_argument("--novelty-min", type=float, default=ADAPTIVE_NOVELTY_MIN,
+                    help="Com --adaptive-pages: fração mínima de registros inéditos por página")
+    ap.add_argument("--relevance-floor", type=float, default=ADAPTIVE_RELEVANCE_FLOOR,
+                    help="Com --adaptive-pages: para se o score da página cair abaixo desta fração do da 1ª página")
+    ap.add_argument("--fast-fetch", action="store_true",
+                    help="OpenAlex com select= e até 200 por página; Crossref com cursor e até 1000 linhas "
+                         "(mesma profundidade de --*-pages × tamanho da página). Com --adaptive-pages, "
+                         "a OpenAlex fica sem select= (o corte por relevância usa o relevance_score)")
 
     # BDTD
     ap.add_argument("--bdtd-pages", type=int, default=BDTD_MAX_PAGES)
@@ -1199,6 +4186,20 @@ def parse_args():
     ap.add_argument("--bdtd-enrich-timeout", type=float, default=BDTD_ENRICH_TIMEOUT)
     ap.add_argument("--bdtd-exact", action="store_true", help="(Compat.) Usa frase exata no lookfor da BDTD")
 
+    # Enriquecimento
+    ap.add_argument("--enrich-workers", type=int, default=ENRICH_WORKERS,
+                    help="Workers do pool de enriquecimento SciELO/BDTD (0 = em linha, bloqueando a paginação)")
+    ap.add_argument("--enrich-per-host", type=int, default=ENRICH_PER_HOST,
+                    help="Máximo de enriquecimentos simultâneos por host")
+    ap.add_argument("--parse-workers", type=int, default=PARSE_WORKERS,
+                    help="Processos para o parsing de HTML/JSON, separados da rede (0 = na thread que buscou)")
+    ap.add_argument("--parse-queue", type=int, default=PARSE_QUEUE_SIZE,
+                    help="Máximo de respostas aguardando parsing; acima disso a busca espera")
+    ap.add_argument("--doi-backfill", action="store_true",
+                    help="Completa registros com DOI (resumo, autores, tipo) via OpenAlex em lotes de 50, "
+                         "sem raspar as páginas SciELO/BDTD desses registros; os que a OpenAlex não completar "
+                         f"são raspados no fim (janela própria de {DOI_BACKFILL_SECONDS}s, além do --max-seconds)")
+
     return ap.parse_args()
 
 if __name__ == "__main__":
@@ -1206,6 +4207,21 @@ if __name__ == "__main__":
     y1, y2 = args.anos.split(":")
     year_min, year_max = int(y1), int(y2)
 
+    configure_http_pool(args.pool_connections, args.pool_size)
+    configure_rate_limits(args.delay, parse_rate_limits(args.rate))
+    if args.cache_only and not args.cache_db:
+        raise SystemExit("--cache-only requer --cache-db")
+    configure_http_cache(args.cache_db, parse_cache_ttls(args.cache_ttl), offline=args.cache_only)
+    configure_hit_context(args.hit_context, args.hit_context_cap)
+    if args.parquet and not _HAS_PYARROW:
+        raise SystemExit("--parquet requer pyarrow (pip install pyarrow)")
+    if args.out_ndjson and ndjson_codec(args.out_ndjson, args.ndjson_compression) == "zstd" and not _HAS_ZSTD:
+        raise SystemExit("NDJSON zstd requer zstandard (pip install zstandard)")
+    if args.out_ndjson and args.ndjson_compression:
+        suffix = NDJSON_SUFFIXES[args.ndjson_compression]
+        if not args.out_ndjson.endswith(suffix):
+            args.out_ndjson += suffix
+
     descrs = build_descritores(args.descritores)
 
     # Tesauro (se houver): TPs como descritores-base e variantes integradas
@@ -1268,5 +4284,19 @@ if __name__ == "__main__":
         checkpoint_seconds=args.checkpoint_seconds,
         checkpoint_records=args.checkpoint_records,
         resume=args.resume,
-        max_seconds=args.max_seconds if args.max_seconds and args.max_seconds > 0 else None
+        max_seconds=args.max_seconds if args.max_seconds and args.max_seconds > 0 else None,
+        parallel=args.parallel,
+        async_mode=args.async_mode, async_concurrency=args.async_concurrency,
+        store=args.store, store_db=args.store_db,
+        fuzzy=args.fuzzy_dedupe,
+        enrich_workers=args.enrich_workers, enrich_per_host=args.enrich_per_host,
+        parse_workers=args.parse_workers, parse_queue=args.parse_queue,
+        doi_backfill=args.doi_backfill,
+        fast_fetch=args.fast_fetch,
+        adaptive_pages=args.adaptive_pages, novelty_min=args.novelty_min, relevance_floor=args.relevance_floor,
+        hits_sidecar=args.hit_context_sidecar,
+        json_compact=args.json_compact,
+        ndjson_compression=args.ndjson_compression,
+        table_out=args.parquet,
+        viewer_index=args.viewer_index
     )
@@ -0,0 +1,185 @@
+"""
+Micro-benchmarks das rotinas quentes de aut_buscas_bibliog.py (dados sintéticos, sem rede).
+
+Uso:
+  python bench_buscas.py abstract [--records 200] [--words 250] [--pages 20]
+  python bench_buscas.py normalize [--records 100000]
+"""
+
+import argparse
+import html
+import random
+import re
+import time
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional
+
+import aut_buscas_bibliog as ab
+
+VOCAB_PT = ("arte rupestre pintura gravura sítio arqueológico parque nacional serra capivara "
+            "piauí nordeste brasil pré-história caçadores coletores registro gráfico tradição "
+            "análise estilo figura humana animal cena datação pigmento abrigo sob rocha paisagem "
+            "patrimônio cultural conservação turismo comunidade pesquisa escavação cerâmica lítico").split()
+STOPWORDS = ("de da do das dos e a o as os em no na com para por que se um uma ao à entre sobre").split()
+
+def best_of(fn: Callable[[], None], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+# ============ abstract_inverted_index ============
+def make_inverted_index(rng: random.Random, n_words: int) -> Dict[str, List[int]]:
+    # texto com a distribuição típica: muitas palavras funcionais repetidas, poucas de conteúdo
+    inv: Dict[str, List[int]] = {}
+    for pos in range(n_words):
+        word = rng.choice(STOPWORDS) if rng.random() < 0.45 else rng.choice(VOCAB_PT) + str(rng.randint(0, 40))
+        inv.setdefault(word, []).append(pos)
+    return inv
+
+def bench_abstract(args):
+    rng = random.Random(42)
+    pages = [[make_inverted_index(rng, rng.randint(args.words // 2, args.words * 2)) for _ in range(args.records)]
+             for _ in range(args.pages)]
+    for page in pages:
+        for inv in page:
+            assert ab.rebuild_abstract(inv) == ab._rebuild_abstract_sorted(inv)
+
+    def run_with(fn):
+        def go():
+            for page in pages:
+                for inv in page:
+                    fn(inv)
+        return go
+
+    old = best_of(run_with(ab._rebuild_abstract_sorted), args.repeat)
+    new = best_of(run_with(ab.rebuild_abstract), args.repeat)
+    n = args.pages * args.records
+    print(f"abstract_inverted_index: {args.pages} páginas × {args.records} registros (~{args.words} palavras)")
+    print(f"  sort por posição : {old * 1000 / args.pages:8.2f} ms/página  ({old * 1e6 / n:7.1f} µs/registro)")
+    print(f"  scatter em slots : {new * 1000 / args.pages:8.2f} ms/página  ({new * 1e6 / n:7.1f} µs/registro)")
+    print(f"  ganho            : {old / new:.2f}×")
+
+# ============ Normalização de texto ============
+# implementações anteriores (re com padrão em string, NFKD a cada chamada), como referência
+def legacy_normalize_title(t: str) -> str:
+    t = re.sub(r"\s+", " ", (t or "")).strip().lower()
+    t = re.sub(r"[^\w\sáéíóúàâêôãõç-]", "", t, flags=re.I)
+    return t
+
+def legacy_strip_accents(s: str) -> str:
+    if not s: return s
+    return "".join(c for c in unicodedata.normalize("NFKD", s) if not unicodedata.combining(c))
+
+def legacy_clean_text(a: Optional[str]) -> str:
+    if not a:
+        return ""
+    a = html.unescape(a)
+    a = re.sub(r"<[^>]+>", " ", a)
+    a = re.sub(r"\s+", " ", a).strip()
+    return a
+
+def legacy_pick_year_from(*vals: Any) -> Optional[int]:
+    for v in vals:
+        if v is None: continue
+        if isinstance(v, int) and 1800 <= v <= 2100:
+            return v
+        if isinstance(v, (list, tuple)):
+            for it in v:
+                y = legacy_pick_year_from(it)
+                if y: return y
+        if isinstance(v, dict):
+            for it in v.values():
+                y = legacy_pick_year_from(it)
+                if y: return y
+        s = str(v)
+        m = re.search(r'\b(18|19|20)\d{2}\b', s)
+        if m: return int(m.group())
+    return None
+
+AUTHOR_GIVEN = ("Maria", "José", "Ana", "João", "Niède", "André", "Gabriela", "Conceição", "Sérgio", "Anne-Marie")
+AUTHOR_FAMILY = ("Guidon", "Pessis", "Martin", "Prous", "Gaspar", "Araújo", "Buco", "Justamand", "Lage", "Fagundes")
+
+def make_records(rng: random.Random, n: int) -> List[Dict[str, Any]]:
+    # perfil de uma coleta real: poucos descritores, autores recorrentes, títulos vistos em várias fontes
+    authors = [f"{rng.choice(AUTHOR_GIVEN)} {rng.choice(AUTHOR_FAMILY)} {rng.choice(AUTHOR_FAMILY)}" for _ in range(2000)]
+    titles = []
+    for _ in range(n // 3):
+        t = " ".join(rng.choice(VOCAB_PT) for _ in range(rng.randint(5, 16))).capitalize()
+        titles.append(t + rng.choice(("", ": um estudo de caso", " &amp; conservação", " <i>in situ</i>")))
+    descrs = [f"{rng.choice(VOCAB_PT)} {rng.choice(VOCAB_PT)}" for _ in range(20)]
+    # datas nos formatos das fontes: texto (SciELO), lista (publishDate da BDTD), date-parts (Crossref)
+    dates = (lambda y: f"{y}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+             lambda y: [str(y)],
+             lambda y: {"date-parts": [[y, rng.randint(1, 12)]]})
+    return [{"titulo": rng.choice(titles),
+             "autores": "; ".join(rng.sample(authors, rng.randint(1, 4))),
+             "descritor": rng.choice(descrs),
+             "data": rng.choice(dates)(rng.randint(1970, 2025))}
+            for _ in range(n)]
+
+def bench_normalize(args):
+    rng = random.Random(7)
+    recs = make_records(rng, args.records)
+
+    def pipeline(normalize_title, strip_accents, clean_text, pick_year_from):
+        def go():
+            for r in recs:
+                titulo = clean_text(r["titulo"])
+                autores = clean_text(r["autores"])
+                pick_year_from(r["data"])
+                strip_accents(r["descritor"])
+                strip_accents(titulo)
+                for a in autores.split("; "):
+                    strip_accents(a)
+                # dedupe_key é chamada na inserção, no merge e no snapshot
+                for _ in range(3):
+                    normalize_title(titulo)
+        return go
+
+    legacy = (legacy_normalize_title, legacy_strip_accents, legacy_clean_text, legacy_pick_year_from)
+    current = (ab.normalize_title, ab.strip_accents, ab.clean_text, ab.pick_year_from)
+    for r in recs[:5000]:
+        for old, new in zip(legacy[:3], current[:3]):
+            assert old(r["titulo"]) == new(r["titulo"]) and old(r["autores"]) == new(r["autores"])
+        assert legacy_pick_year_from(r["data"]) == ab.pick_year_from(r["data"])
+
+    def cold(fns):
+        go = pipeline(*fns)
+        def run():
+            for fn in fns:
+                if hasattr(fn, "cache_clear"):
+                    fn.cache_clear()
+            ab._clean_text_cached.cache_clear()
+            go()
+        return run
+
+    old = best_of(cold(legacy), args.repeat)
+    new = best_of(cold(current), args.repeat)
+    print(f"normalização: {args.records} registros (caches zerados a cada rodada)")
+    print(f"  re + NFKD por chamada      : {old:6.2f} s  ({old * 1e6 / args.records:6.1f} µs/registro)")
+    print(f"  pré-compilado + translate  : {new:6.2f} s  ({new * 1e6 / args.records:6.1f} µs/registro)")
+    print(f"  ganho                      : {old / new:.2f}×")
+    info = ab.normalize_title.cache_info()
+    print(f"  cache normalize_title      : {info.hits} hits / {info.misses} misses")
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Micro-benchmarks de aut_buscas_bibliog.py")
+    sub = ap.add_subparsers(dest="bench", required=True)
+    p = sub.add_parser("abstract", help="Remontagem do resumo a partir do abstract_inverted_index (OpenAlex)")
+    p.add_argument("--records", type=int, default=200, help="Registros por página")
+    p.add_argument("--words", type=int, default=250, help="Tamanho médio do resumo (palavras)")
+    p.add_argument("--pages", type=int, default=20)
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_abstract)
+    p = sub.add_parser("normalize", help="normalize_title/strip_accents/clean_text/pick_year_from")
+    p.add_argument("--records", type=int, default=100000)
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_normalize)
+    return ap.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    args.func(args)